@@ -0,0 +1,56 @@
+"""
+Import-time benchmark and regression guard for ``import tiffinspector``.
+
+Each measurement runs in a fresh interpreter. The time spent importing tiffinspector on top of tifffile (which
+pulls in numpy and is needed by every inspection) is compared against a budget, and the notebook, packaging and
+process pool modules that are only needed for display, the version and batch inspection are checked to not be
+imported. The script exits with a non-zero status if either guard fails.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--max-overhead-ms 50]
+"""
+import argparse, json, subprocess, sys
+
+DEFERRED_MODULES = ('IPython', 'xmltodict', 'pkg_resources', 'multiprocessing', 'importlib.metadata')
+
+def time_import(statement):
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def imported_modules(statement, modules):
+    code = f"import sys, json; {statement}; print(json.dumps([x for x in {list(modules)!r} if x in sys.modules]))"
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-overhead-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    tifffile_s = min(time_import('import tifffile') for _ in range(args.repeat))
+    package_s = min(time_import('import tiffinspector') for _ in range(args.repeat))
+    overhead_ms = 1e3 * (package_s - tifffile_s)
+    deferred = imported_modules('import tiffinspector', DEFERRED_MODULES)
+
+    results = {
+        'tifffile_import_ms': 1e3 * tifffile_s,
+        'tiffinspector_import_ms': 1e3 * package_s,
+        'overhead_ms': overhead_ms,
+        'max_overhead_ms': args.max_overhead_ms,
+        'eagerly_imported': deferred,
+    }
+    print(json.dumps(results, indent=2))
+
+    failed = False
+    if deferred:
+        print(f"FAIL: modules imported at package import: {', '.join(deferred)}", file=sys.stderr)
+        failed = True
+    if overhead_ms > args.max_overhead_ms:
+        print(f"FAIL: import overhead {overhead_ms:.1f} ms exceeds {args.max_overhead_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
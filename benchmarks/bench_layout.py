@@ -0,0 +1,91 @@
+"""
+Benchmark of the text and HTML layout builders on synthetic reports of increasing size.
+
+Reports with one series, one level and a given number of pages (each with a run of frames) are built in memory,
+so no TIFF file is needed. For each size the time per page of get_layout_text, get_layout_html and write_layout
+to a null file is reported; with linear scaling the time per page stays flat as the page count grows. The
+"before" numbers use the previous string concatenation builder with a regex compiled per shape.
+
+Usage:
+    python benchmarks/bench_layout.py [--pages 1000 10000 100000] [--repeat 3]
+"""
+import argparse, json, os, re, time
+
+from tiffinspector.frames import run_index_text
+from tiffinspector.report_generator import get_layout_html, get_layout_text, write_layout, _run_count_text
+
+class SyntheticReport:
+    def __init__(self, pages):
+        self.report = synthetic_report(pages)
+
+def synthetic_report(pages):
+    shape = [512, 512, 3]
+    return {
+        'metadata': {'filename': 'synthetic.tif'},
+        'series_count': 1,
+        'series': [{
+            'metadata': {'index': 0, 'name': 'Baseline', 'shape': [pages, *shape], 'axes': 'IYXS'},
+            'level_count': 1,
+            'levels': [{
+                'metadata': {'name': 'Baseline', 'shape': [pages, *shape], 'axes': 'IYXS'},
+                'level_index': 0,
+                'pages': [{
+                    'metadata': {'index': k, 'shape': shape, 'axes': 'YXS'},
+                    'frames': [{'start': 2*k+1, 'count': 1, 'stride': 1,
+                                'metadata': {'shape': shape, 'axes': 'YXS'}}],
+                    'frame_count': 1,
+                } for k in range(pages)]
+            }]
+        }]
+    }
+
+def legacy_bold_integers_in_list(input_list):
+    int_regex = re.compile(r'\b\d+\b')
+    return int_regex.sub(lambda match: f'<b>{match.group()}</b>', str(input_list))
+
+def legacy_layout_html(self):
+    html = '<div>'
+    for series in self.report["series"]:
+        html += f'<div>Series shape:{legacy_bold_integers_in_list(series["metadata"]["shape"])}</div>'
+        for level in series["levels"]:
+            html += f'<div>Level shape:{legacy_bold_integers_in_list(level["metadata"]["shape"])}</div>'
+            for page in level["pages"]:
+                html += f'<div>Page index:<b>{page["metadata"]["index"]}</b> shape:{legacy_bold_integers_in_list(page["metadata"]["shape"])}</div>'
+                for run in page["frames"]:
+                    html += f'<div>Frame index:<b>{run_index_text(run)}</b>{_run_count_text(run)} shape:{legacy_bold_integers_in_list(run["metadata"]["shape"])}</div>'
+    html += '</div>'
+    return html
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    with open(os.devnull, 'w') as null:
+        for pages in args.pages:
+            inspector = SyntheticReport(pages)
+            timings = {
+                'text': best_of(lambda: get_layout_text(inspector), args.repeat),
+                'html': best_of(lambda: get_layout_html(inspector), args.repeat),
+                'html_before': best_of(lambda: legacy_layout_html(inspector), args.repeat),
+                'write_text': best_of(lambda: write_layout(inspector, null, 'text'), args.repeat),
+                'write_html': best_of(lambda: write_layout(inspector, null, 'html'), args.repeat),
+            }
+            result = {'pages': pages}
+            result.update((f'{name}_us_per_page', 1e6 * seconds / pages) for name, seconds in timings.items())
+            results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
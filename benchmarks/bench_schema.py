@@ -0,0 +1,63 @@
+"""
+Benchmark of per-page metadata extraction with and without the schema registry.
+
+The "before" numbers re-read and parse the schema file for every page and look up each property with getattr,
+which is what TiffInspector did before schemas were cached. The "after" numbers use utils.extract_metadata.
+
+Usage:
+    python benchmarks/bench_schema.py [--pages 2000] [--repeat 3]
+"""
+import argparse, json, os, tempfile, time
+
+import numpy as np
+import tifffile
+
+from tiffinspector import TiffInspector
+from tiffinspector.utils import _read_schema_file, extract_metadata
+
+def legacy_extract(obj, schema_name):
+    schema = _read_schema_file(schema_name)
+    properties = list(schema['properties']['metadata']['properties'].keys())
+    metadata = dict([(x,getattr(obj, x)) for x in properties])
+    for _property in metadata.keys():
+        if isinstance(getattr(obj, _property),(tuple,set)):
+            metadata[_property] = list(metadata[_property])
+    return metadata
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, 'stack.tif')
+        with tifffile.TiffWriter(file_path) as tw:
+            for _ in range(args.pages):
+                tw.write(np.zeros((16, 16), np.uint8), contiguous=False)
+
+        with tifffile.TiffFile(file_path) as tiff:
+            pages = list(tiff.pages)
+            before = best_of(lambda: [legacy_extract(page, 'page_schema') for page in pages], args.repeat)
+            after = best_of(lambda: [extract_metadata(page, 'page_schema') for page in pages], args.repeat)
+        inspect = best_of(lambda: TiffInspector(file_path), args.repeat)
+
+    results = {
+        'pages': args.pages,
+        'extract_us_per_page_before': 1e6 * before / args.pages,
+        'extract_us_per_page_after': 1e6 * after / args.pages,
+        'speedup': before / after if after else None,
+        'inspect_us_per_page': 1e6 * inspect / args.pages,
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
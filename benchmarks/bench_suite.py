@@ -0,0 +1,142 @@
+"""
+Benchmark suite of the TiffInspector hot paths on synthetic TIFF files.
+
+For every synthetic file (see synthetic.py: a shaped stack of TiffFrames, separately written pages of alternating
+width read as TiffPages, a deep SubIFD pyramid, an OME-TIFF with a large OME-XML description and a tiled BigTIFF)
+the suite measures:
+
+    construct_eager / construct_lazy   building the report, and its peak traced memory (tracemalloc)
+    slice_levels / slice_series        levels(0) and series(0) views of the eager inspector
+    layout_text / layout_html          str() and _repr_html_() of the eager inspector
+    write_json / write_jsonl           write_report to a null file, plain and with compact_tags
+    write_json_lazy                    write_report of a lazy inspector, building pages as they are written
+
+Times are the best of --repeat runs in milliseconds; peak memory is measured in a separate, untimed run. The
+results are printed (or written with --output) as JSON. With --baseline, every time is compared with a
+previous result file and the script exits with status 1 if any that took at least --min-ms before is now more
+than --max-slowdown times slower.
+
+Usage:
+    python benchmarks/bench_suite.py [--scale 1.0] [--cases stack ome] [--repeat 3] [--output results.json]
+                                     [--baseline previous.json --max-slowdown 1.5 --min-ms 1]
+"""
+import argparse, json, os, platform, sys, tempfile, time, tracemalloc
+
+import tifffile
+
+from tiffinspector import TiffInspector, __version__
+
+from synthetic import GENERATORS, generate
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return 1e3 * min(times)
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+def write_to(null, file_path, lazy=False, **kwargs):
+    def write():
+        with TiffInspector(file_path, lazy=lazy) as inspector:
+            inspector.write_report(null, **kwargs)
+    return write
+
+def bench_file(file_path, repeat):
+    eager = TiffInspector(file_path)
+    result = {
+        'file_bytes': os.path.getsize(file_path),
+        'page_count': eager.report['page_count'],
+        'times_ms': {},
+        'peak_memory_bytes': {}
+    }
+    times = result['times_ms']
+    times['construct_eager'] = best_of(lambda: TiffInspector(file_path).close(), repeat)
+    times['construct_lazy'] = best_of(lambda: TiffInspector(file_path, lazy=True).close(), repeat)
+    times['slice_levels'] = best_of(lambda: eager.levels(0), repeat)
+    times['slice_series'] = best_of(lambda: eager.series(0), repeat)
+    times['layout_text'] = best_of(lambda: str(eager), repeat)
+    times['layout_html'] = best_of(lambda: eager._repr_html_(), repeat)
+    with open(os.devnull, 'w') as null:
+        times['write_json'] = best_of(lambda: eager.write_report(null), repeat)
+        times['write_json_compact'] = best_of(lambda: eager.write_report(null, compact_tags=True), repeat)
+        times['write_jsonl'] = best_of(lambda: eager.write_report(null, format='jsonl'), repeat)
+        times['write_json_lazy'] = best_of(write_to(null, file_path, lazy=True), repeat)
+
+        memory = result['peak_memory_bytes']
+        memory['construct_eager'], inspector = peak_memory(lambda: TiffInspector(file_path))
+        inspector.close()
+        memory['construct_lazy'], inspector = peak_memory(lambda: TiffInspector(file_path, lazy=True))
+        inspector.close()
+        memory['write_json_lazy'], _ = peak_memory(write_to(null, file_path, lazy=True))
+    eager.close()
+    return result
+
+def compare(results, baseline, max_slowdown, min_ms):
+    regressions = []
+    for case, result in results['cases'].items():
+        previous = baseline.get('cases', {}).get(case)
+        if previous is None:
+            continue
+        for name, ms in result['times_ms'].items():
+            before = previous['times_ms'].get(name)
+            # timings this short are dominated by noise
+            if before and before >= min_ms and ms > max_slowdown * before:
+                regressions.append({'case': case, 'measure': name, 'before_ms': before, 'after_ms': ms,
+                                    'slowdown': ms / before})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies the page counts and pyramid size.')
+    parser.add_argument('--cases', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='Write the results to this JSON file instead of stdout.')
+    parser.add_argument('--baseline', default=None, help='A previous results file to compare the times with.')
+    parser.add_argument('--max-slowdown', type=float, default=1.5)
+    parser.add_argument('--min-ms', type=float, default=1.0, help='Baseline times below this are not compared.')
+    args = parser.parse_args()
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'tifffile': tifffile.__version__,
+            'tiffinspector': __version__
+        },
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'cases': {}
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in args.cases:
+            file_path = generate(name, tmpdir, args.scale)
+            results['cases'][name] = bench_file(file_path, args.repeat)
+
+    status = 0
+    if args.baseline is not None:
+        with open(args.baseline) as fp:
+            results['regressions'] = compare(results, json.load(fp), args.max_slowdown, args.min_ms)
+        if results['regressions']:
+            status = 1
+            for regression in results['regressions']:
+                print(f"FAIL: {regression['case']} {regression['measure']} is {regression['slowdown']:.2f}x slower",
+                      file=sys.stderr)
+
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
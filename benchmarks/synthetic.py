@@ -0,0 +1,102 @@
+"""
+Generators of synthetic TIFF files for the benchmarks.
+
+Every generator writes a file with tifffile and returns its path. Image data is zeros compressed with zlib
+where the layout allows, so the files stay small while the IFD structure is as large as requested.
+
+Usage:
+    python benchmarks/synthetic.py OUTPUT_DIRECTORY [--scale 1.0]
+"""
+import argparse, os
+
+import numpy as np
+import tifffile
+
+def stack(file_path, pages=2000, shape=(64, 64)):
+    """
+    A shaped stack of pages written as one array; tifffile reads every page after the first as a TiffFrame.
+    """
+    tifffile.imwrite(file_path, np.zeros((pages, *shape), np.uint8), compression='zlib')
+    return file_path
+
+def pages(file_path, pages=2000, shape=(64, 64)):
+    """
+    Pages written one at a time, each with its own short description, so every page has a distinct tag table.
+
+    The width alternates between two values so that tifffile reads every page as a TiffPage (in two series)
+    rather than all but the first as TiffFrames of one uniform series, whose tags are not read.
+    """
+    with tifffile.TiffWriter(file_path) as tw:
+        for k in range(pages):
+            tw.write(np.zeros((shape[0], shape[1]+k%2), np.uint8), contiguous=False, metadata=None,
+                     description=f"page {k}")
+    return file_path
+
+def pyramid(file_path, size=16384, tile=(256, 256), min_size=256):
+    """
+    A tiled pyramid whose reduced levels are SubIFDs, halving the size down to min_size.
+    """
+    sizes = []
+    while size >= min_size:
+        sizes.append(size)
+        size //= 2
+    with tifffile.TiffWriter(file_path, bigtiff=True) as tw:
+        for n, level_size in enumerate(sizes):
+            data = np.zeros((level_size, level_size), np.uint8)
+            options = dict(subifds=len(sizes)-1) if n == 0 else dict(subfiletype=1)
+            tw.write(data, tile=tile, compression='zlib', **options)
+    return file_path
+
+def ome(file_path, planes=(10, 4, 50), shape=(32, 32)):
+    """
+    An OME-TIFF with one page per T, C and Z plane, whose OME-XML description has a Plane element per page.
+    """
+    count = int(np.prod(planes))
+    metadata = {
+        'axes': 'TCZYX',
+        'Channel': {'Name': [f"channel {c}" for c in range(planes[1])]},
+        'Plane': {
+            'PositionX': [0.5]*count,
+            'PositionY': [1.5]*count,
+            'PositionZ': [float(k) for k in range(count)],
+            'ExposureTime': [0.1]*count
+        }
+    }
+    tifffile.imwrite(file_path, np.zeros((*planes, *shape), np.uint8), ome=True, metadata=metadata,
+                     compression='zlib')
+    return file_path
+
+def bigtiff(file_path, pages=500, shape=(512, 512), tile=(128, 128)):
+    """
+    A BigTIFF stack of tiled pages.
+    """
+    tifffile.imwrite(file_path, np.zeros((pages, *shape), np.uint8), bigtiff=True, tile=tile, compression='zlib')
+    return file_path
+
+GENERATORS = {
+    'stack': lambda path, scale: stack(path, pages=max(1, int(2000*scale))),
+    'pages': lambda path, scale: pages(path, pages=max(1, int(2000*scale))),
+    'pyramid': lambda path, scale: pyramid(path, size=int(16384*max(scale, 1/64))),
+    'ome': lambda path, scale: ome(path, planes=(max(1, int(10*scale)), 4, 50)),
+    'bigtiff': lambda path, scale: bigtiff(path, pages=max(1, int(500*scale))),
+}
+
+def generate(name, directory, scale=1.0):
+    """
+    Writes the synthetic file of a generator in GENERATORS into a directory and returns its path.
+    """
+    return GENERATORS[name](os.path.join(directory, f"{name}.tif"), scale)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--cases', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    args = parser.parse_args()
+    os.makedirs(args.directory, exist_ok=True)
+    for name in args.cases:
+        file_path = generate(name, args.directory, args.scale)
+        print(file_path, os.path.getsize(file_path))
+
+if __name__ == '__main__':
+    main()
@@ -10,13 +10,20 @@ setuptools.setup(
     packages=['tiffinspector'],
     install_requires=[
         "importlib_metadata; python_version<'3.8'",
+        "importlib_resources; python_version<'3.9'",
         "tifffile>=2021.1.1",
         "imagecodecs",
         "ipython",
         "xmltodict"
     ],
+    extras_require={
+        "columnar": ["pyarrow"]
+    },
+    entry_points={
+        "console_scripts": ["tiff-inspector=tiffinspector.cli:main"]
+    },
     package_data={
-        "tiffinspector":["../schemas/*.json"]
+        "tiffinspector":["schemas/*.json"]
     },
     author="Jason L Weirather",
     author_email="jason.weirather@gmail.com",
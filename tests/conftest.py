@@ -0,0 +1,31 @@
+import os, sys
+
+import pytest
+import tifffile
+
+# the synthetic TIFF generators of the benchmark suite
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'benchmarks'))
+
+import synthetic
+
+@pytest.fixture
+def synthetic_file(tmp_path):
+    """
+    Returns a function writing a synthetic file (see benchmarks/synthetic.py) into a temporary directory.
+    """
+    def generate(name, scale=0.05):
+        return synthetic.generate(name, str(tmp_path), scale)
+    return generate
+
+@pytest.fixture
+def ifds_read(monkeypatch):
+    """
+    Counts the TiffPages and TiffFrames that tifffile creates, each of which is read from an IFD of the file.
+    """
+    counts = {'TiffPage': 0, 'TiffFrame': 0}
+    for cls in (tifffile.TiffPage, tifffile.TiffFrame):
+        def counting(self, *args, _init=cls.__init__, _name=cls.__name__, **kwargs):
+            counts[_name] += 1
+            _init(self, *args, **kwargs)
+        monkeypatch.setattr(cls, '__init__', counting)
+    return counts
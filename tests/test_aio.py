@@ -0,0 +1,15 @@
+import asyncio
+
+from tiffinspector.aio import AsyncInspector
+
+def test_concurrent_requests_share_one_parse(synthetic_file):
+    file_path = synthetic_file('stack')
+    async def main():
+        async with AsyncInspector(max_workers=2) as inspector:
+            first, second = await asyncio.gather(inspector.inspect(file_path), inspector.inspect(file_path))
+            records = [record async for record in inspector.inspect_many([file_path, 'missing.tif'], ordered=True)]
+        return first, second, records
+    first, second, records = asyncio.run(main())
+    assert first is second
+    assert records[0]['report']['page_count'] == first['page_count']
+    assert records[1]['error']['type'] == 'FileNotFoundError'
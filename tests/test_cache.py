@@ -0,0 +1,22 @@
+import numpy
+
+from tiffinspector import ReportCache, TiffInspector
+
+def tile_offsets(inspector):
+    page = inspector.report['series'][0]['levels'][0]['pages'][0]
+    return dict((row[0], row[4]) for row in page['tags'])['TileOffsets']
+
+def test_hit_returns_the_same_report(tmp_path, synthetic_file):
+    file_path = synthetic_file('pyramid')
+    cache = ReportCache(str(tmp_path / 'cache'))
+    with TiffInspector(file_path, cache=cache) as inspector:
+        fresh = inspector.report
+    with TiffInspector(file_path, cache=cache) as inspector:
+        assert inspector.report == fresh
+
+def test_array_policy_is_not_cached(tmp_path, synthetic_file):
+    file_path = synthetic_file('pyramid', scale=1/16)
+    cache = ReportCache(str(tmp_path / 'cache'))
+    for _ in range(2):
+        with TiffInspector(file_path, cache=cache, large_tag_values='array', max_tag_values=2) as inspector:
+            assert isinstance(tile_offsets(inspector), numpy.ndarray)
@@ -0,0 +1,57 @@
+import numpy
+import pytest
+import tifffile
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.dataset
+
+from tiffinspector import TiffInspector, write_columnar
+from tiffinspector.columnar import ColumnarWriter
+
+def read_table(directory, name, format='parquet'):
+    return pyarrow.dataset.dataset(str(directory / name), format=format).to_table()
+
+def palette_file(tmp_path):
+    file_path = str(tmp_path / 'palette.tif')
+    colormap = numpy.arange(3*256, dtype=numpy.uint16).reshape(3, 256)
+    tifffile.imwrite(file_path, numpy.zeros((16, 16), numpy.uint8), photometric='palette', colormap=colormap)
+    return file_path
+
+@pytest.mark.parametrize('format', ['parquet', 'arrow'])
+def test_append_across_runs(tmp_path, synthetic_file, format):
+    stack = synthetic_file('stack')
+    pyramid = synthetic_file('pyramid')
+    output = tmp_path / 'tables'
+    assert write_columnar([stack, pyramid], str(output), format=format, processes=1) == {'files': 2, 'failures': 0}
+    assert write_columnar([stack], str(output), format=format, processes=1) == {'files': 1, 'failures': 0}
+    files = read_table(output, 'files', format)
+    assert files.num_rows == 3
+    pages = read_table(output, 'pages', format)
+    with TiffInspector(pyramid) as inspector:
+        page_count = sum(len(level['pages']) for level in inspector.report['series'][0]['levels'])
+    assert pages.filter(pa.compute.equal(pages['file_path'], pyramid)).num_rows == page_count
+    tags = read_table(output, 'tags', format)
+    assert pa.types.is_dictionary(tags.schema.field('name').type)
+    compression = tags.filter(pa.compute.equal(tags['name'], 'Compression'))
+    assert set(compression['value_text'].to_pylist()) == {'ADOBE_DEFLATE'}
+
+def test_values_not_fitting_the_schema(tmp_path, synthetic_file):
+    output = tmp_path / 'tables'
+    counts = write_columnar([palette_file(tmp_path), synthetic_file('stack')], str(output), processes=1)
+    assert counts == {'files': 2, 'failures': 0}
+    pages = read_table(output, 'pages')
+    palette = pages.filter(pa.compute.match_substring(pages['file_path'].cast(pa.string()), 'palette')).to_pylist()
+    assert palette[0]['colormap'] is None
+    assert '"colormap"' in palette[0]['other_metadata']
+
+def test_unwritable_report_is_a_failure(tmp_path, synthetic_file):
+    output = tmp_path / 'tables'
+    stack = synthetic_file('stack')
+    with TiffInspector(stack) as inspector:
+        report = inspector.report
+    with ColumnarWriter(str(output)) as writer:
+        counts = writer.write_records([{'file_path': 'broken.tif', 'report': {'shape': 'not a shape'}},
+                                       {'file_path': stack, 'report': report}])
+    assert counts == {'files': 2, 'failures': 1}
+    files = read_table(output, 'files').to_pylist()
+    assert [x['error_type'] for x in files] == ['KeyError', None]
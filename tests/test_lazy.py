@@ -0,0 +1,94 @@
+import copy, json, pickle
+
+import pytest
+
+from tiffinspector import TiffInspector
+from tiffinspector.lazy import LazyDict, iter_items
+from tiffinspector.utils import json_default
+
+def counting(value):
+    calls = []
+    def loader():
+        calls.append(1)
+        return value
+    return loader, calls
+
+def test_deferred_value_built_once():
+    loader, calls = counting([1, 2, 3])
+    node = LazyDict({'a': 1})
+    node.defer('b', loader)
+    assert list(node) == ['a', 'b'] and len(node) == 2 and 'b' in node
+    assert not node.is_loaded('b') and node.is_loaded('a')
+    assert not calls
+    assert node['b'] == [1, 2, 3] and node['b'] is node['b']
+    assert node.is_loaded('b') and len(calls) == 1
+
+def test_stream_does_not_store():
+    loader, calls = counting([1, 2, 3])
+    node = LazyDict()
+    node.defer('pages', loader, stream=lambda start, stop: iter([1, 2, 3][start:stop]))
+    assert list(iter_items(node, 'pages')) == [1, 2, 3]
+    assert not calls and not node.is_loaded('pages')
+    assert node['pages'] == [1, 2, 3]
+    # once built, the stored value is iterated
+    assert list(iter_items(node, 'pages')) == [1, 2, 3] and len(calls) == 1
+    assert list(iter_items({'pages': [4]}, 'pages')) == [4]
+
+def test_copy_shares_deferred():
+    loader, calls = counting({'x': 1})
+    node = LazyDict({'a': 1})
+    node.defer('b', loader)
+    other = node.copy()
+    assert other['b'] is node['b'] and len(calls) == 1
+    other['a'] = 2
+    assert node['a'] == 1
+
+def test_set_and_delete_pending():
+    loader, calls = counting(1)
+    node = LazyDict()
+    node.defer('a', loader)
+    node['a'] = 2
+    assert node['a'] == 2 and node.is_loaded('a')
+    node.defer('b', loader)
+    del node['b']
+    assert 'b' not in node and not calls
+    node.defer('c', loader)
+    assert node.pop('c') == 1 and 'c' not in node
+    assert node.get('d', 3) == 3 and node.setdefault('d', 4) == 4
+
+def test_plain_dict_semantics():
+    node = LazyDict({'a': 1})
+    node.defer('b', lambda: [LazyDict(deferred={'c': lambda: 'd'})])
+    expected = {'a': 1, 'b': [{'c': 'd'}]}
+    assert node == expected and dict(node) == expected and {**node} == expected
+    assert json.loads(json.dumps(node)) == expected
+    for value in (pickle.loads(pickle.dumps(node)), copy.deepcopy(node)):
+        assert type(value) is dict and value == expected
+
+def test_lazy_report_equals_eager(synthetic_file):
+    file_path = synthetic_file('pyramid')
+    with TiffInspector(file_path) as eager, TiffInspector(file_path, lazy=True) as lazy:
+        series = lazy.report['series'][0]
+        assert not series.is_loaded('levels')
+        level = series['levels'][0]
+        assert series.is_loaded('levels') and not level.is_loaded('pages')
+        assert len(list(iter_items(level, 'pages'))) == len(eager.report['series'][0]['levels'][0]['pages'])
+        assert not level.is_loaded('pages')
+        assert json.dumps(lazy.report, default=json_default) == json.dumps(eager.report, default=json_default)
+        assert level.is_loaded('pages')
+
+@pytest.mark.parametrize('name', ['stack', 'ome', 'bigtiff'])
+def test_lazy_init_reads_first_ifds(synthetic_file, ifds_read, name):
+    file_path = synthetic_file(name)
+    with TiffInspector(file_path, lazy=True) as lazy:
+        report = lazy.report
+        assert not report.is_loaded('series')
+        # the first IFD(s) determine the top-level fields of these files
+        assert (report['shape'], report['dtype'], report['series_count'], report['page_count'])
+        # the first, second, eighth and last IFD for tifffile's file flags, the second once more for is_mdgel
+        assert ifds_read['TiffPage'] <= 5 and ifds_read['TiffFrame'] == 0
+        # tifffile reads every IFD to build the series
+        report['series']
+        assert ifds_read['TiffPage']+ifds_read['TiffFrame'] >= report['page_count']
+    with TiffInspector(file_path) as eager:
+        assert json.dumps(report, default=json_default) == json.dumps(eager.report, default=json_default)
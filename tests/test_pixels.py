@@ -0,0 +1,45 @@
+import numpy
+import pytest
+import tifffile
+
+from tiffinspector import TiffInspector
+from tiffinspector.pixels import PixelBudget, level_pixel_stats
+
+@pytest.mark.parametrize('sample_chunks', [1, 4, 16])
+def test_sample_multipage_tiled(synthetic_file, sample_chunks):
+    file_path = synthetic_file('bigtiff')
+    with TiffInspector(file_path, pixel_stats='sample', pixel_sample_chunks=sample_chunks) as inspector:
+        stats = inspector.report['series'][0]['levels'][0]['pixel_stats']
+    assert stats['chunks_read'] == sample_chunks
+    assert stats['min'] == stats['max'] == 0
+    assert stats['blank_chunks'] == sample_chunks
+
+def test_all_chunks_match_image(tmp_path):
+    data = numpy.random.RandomState(0).randint(0, 1000, (3, 100, 90)).astype(numpy.uint16)
+    file_path = str(tmp_path / 'random.tif')
+    tifffile.imwrite(file_path, data, tile=(32, 32), compression='zlib', photometric='minisblack')
+    with tifffile.TiffFile(file_path) as tiff:
+        stats = level_pixel_stats(tiff.series[0], sample_chunks=None)
+    assert stats['complete']
+    assert (stats['min'], stats['max']) == (data.min(), data.max())
+    assert stats['mean'] == pytest.approx(data.mean())
+    assert stats['std'] == pytest.approx(data.std())
+    # edge tiles are cropped to the image
+    assert sum(stats['histogram']['counts']) == data.size
+    assert stats['blank_chunks'] == 0
+
+def test_byte_budget(synthetic_file):
+    file_path = synthetic_file('bigtiff')
+    with tifffile.TiffFile(file_path) as tiff:
+        level = tiff.series[0]
+        bytecount = level.pages[0].databytecounts[0]
+        stats = level_pixel_stats(level, sample_chunks=16, max_bytes=3*bytecount)
+    assert stats['chunks_read'] == 3
+    assert stats['bytes_read'] <= 3*bytecount
+
+def test_budget_shares():
+    budget = PixelBudget(100, 2)
+    share = budget.take()
+    assert share == 50
+    budget.spend(share, 10)
+    assert budget.take() == 90
@@ -0,0 +1,108 @@
+import json
+
+import numpy
+import pytest
+import tifffile
+
+from tiffinspector import TiffInspector, diff_reports
+from tiffinspector.refresh import resume_points, seed_ifd_chain
+from tiffinspector.utils import json_default
+
+def dump(report):
+    return json.dumps(report, default=json_default, sort_keys=True)
+
+def write_pages(file_path, start, stop):
+    # pages of alternating width, so that each is read as a TiffPage
+    for k in range(start, stop):
+        tifffile.imwrite(file_path, numpy.full((8, 8+k%2), k, numpy.uint8), append=k > 0, metadata=None,
+                         description=f"page {k}")
+
+def write_frames(file_path, start, stop):
+    # equally shaped pages, which tifffile reads as TiffFrames once the file has enough of them
+    for k in range(start, stop):
+        tifffile.imwrite(file_path, numpy.zeros((8, 8), numpy.uint8), append=k > 0, metadata=None)
+
+@pytest.mark.parametrize('write', [write_pages, write_frames])
+@pytest.mark.parametrize('lazy', [False, True])
+def test_refresh_matches_fresh_report(tmp_path, write, lazy):
+    file_path = str(tmp_path / 'growing.tif')
+    write(file_path, 0, 5)
+    with TiffInspector(file_path, lazy=lazy) as inspector:
+        old_pages = [level['pages'] for series in inspector.report['series'] for level in series['levels']]
+        write(file_path, 5, 8)
+        diff = inspector.refresh()
+        with TiffInspector(file_path, lazy=lazy) as fresh:
+            assert dump(inspector.report) == dump(fresh.report)
+        assert inspector.report['page_count'] == 8
+        assert diff['changed'] or diff['added']
+        if write is write_frames:
+            # the grown file is read as one uniform series of frames, so its page reports are built anew
+            return
+        # every page report but the last of each level is kept
+        new_pages = [level['pages'] for series in inspector.report['series'] for level in series['levels']]
+        for old, new in zip(old_pages, new_pages):
+            assert all(a is b for a, b in zip(old[:-1], new))
+        assert inspector.refresh() == {'added': [], 'removed': [], 'changed': []}
+
+def test_added_pages_in_diff(tmp_path):
+    file_path = str(tmp_path / 'growing.tif')
+    write_pages(file_path, 0, 4)
+    with TiffInspector(file_path) as inspector:
+        write_pages(file_path, 4, 6)
+        diff = inspector.refresh()
+    assert ['series', 0, 'levels', 0, 'pages', 2] in diff['added']
+    assert ['series', 1, 'levels', 0, 'pages', 2] in diff['added']
+    assert {'path': ['page_count'], 'old': 4, 'new': 6} in diff['changed']
+
+def test_seed_ifd_chain(tmp_path):
+    file_path = str(tmp_path / 'growing.tif')
+    write_pages(file_path, 0, 4)
+    with tifffile.TiffFile(file_path) as previous:
+        offsets = [page.offset for page in previous.pages]
+        write_pages(file_path, 4, 6)
+        with tifffile.TiffFile(file_path) as tiff:
+            assert seed_ifd_chain(tiff, previous) == 3
+            assert len(tiff.pages) == 6
+            assert [page.offset for page in tiff.pages][:4] == offsets
+        with tifffile.TiffFile(file_path) as tiff:
+            assert [page.offset for page in tiff.pages][:4] == offsets
+
+def test_resume_points(tmp_path):
+    file_path = str(tmp_path / 'frames.tif')
+    write_frames(file_path, 0, 5)
+    with TiffInspector(file_path) as inspector:
+        points = resume_points(inspector.report, inspector.tiff)
+        level = inspector.tiff.series[0]
+        kept, start, offset = points[level.pages[0].offset]
+        # the last page report is walked again
+        assert kept == inspector.report['series'][0]['levels'][0]['pages'][:4]
+        assert (start, offset) == (4, level.pages[4].offset)
+
+def test_changed_tags_in_diff():
+    row = ['ImageDescription', '2', 100, 4, 'old']
+    old = {'page_count': 1, 'series': [{'levels': [{'pages': [{'tags': [row], 'frame_count': 0}]}]}]}
+    new = {'page_count': 1, 'series': [{'levels': [{'pages': [{'tags': [row[:4]+['new']], 'frame_count': 0}]}]}]}
+    diff = diff_reports(old, new)
+    assert diff['changed'] == [{'path': ['series', 0, 'levels', 0, 'pages', 0, 'tags', 'ImageDescription'],
+                                'old': row, 'new': row[:4]+['new']}]
+    # shared subtrees are not compared
+    assert diff_reports(old, dict(old)) == {'added': [], 'removed': [], 'changed': []}
+
+def test_refresh_parses_only_appended_pages(tmp_path, ifds_read):
+    file_path = str(tmp_path / 'growing.tif')
+    write_pages(file_path, 0, 40)
+    with TiffInspector(file_path) as inspector:
+        write_pages(file_path, 40, 42)
+        ifds_read['TiffPage'] = 0
+        inspector.refresh()
+        refreshed = ifds_read['TiffPage']
+        # the two appended pages, and the few IFDs read for tifffile's file flags
+        assert refreshed < 15
+        ifds_read['TiffPage'] = 0
+        with TiffInspector(file_path) as fresh:
+            assert ifds_read['TiffPage'] >= 42
+            assert dump(inspector.report) == dump(fresh.report)
+        # the reused pages read their data through the new file
+        page = inspector.tiff.series[0].pages[1]
+        assert page.parent is inspector.tiff and all(tag.parent is inspector.tiff for tag in page.tags.values())
+        assert (page.asarray() == 2).all()
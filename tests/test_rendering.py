@@ -0,0 +1,66 @@
+import json, re
+
+import numpy
+import tifffile
+
+from tiffinspector import TiffInspector
+from tiffinspector.utils import json_default
+
+def test_rendering_does_not_change_the_report(synthetic_file):
+    with TiffInspector(synthetic_file('ome')) as inspector:
+        before = json.dumps(inspector.report, default=json_default)
+        inspector.render_report_html()
+        inspector.levels(0).render_report_html()
+        assert json.dumps(inspector.report, default=json_default) == before
+        assert inspector._descriptions
+
+def test_truncation_note_names_the_level_to_continue_with(tmp_path):
+    file_path = str(tmp_path / 'series.tif')
+    for k in range(4):
+        tifffile.imwrite(file_path, numpy.full((2, 8, 8), k, numpy.uint8), append=k > 0)
+    with TiffInspector(file_path) as inspector:
+        html = inspector.render_report_html(max_bytes=500)
+        match = re.search(r'\.series\((\d+)\)\.levels\((\d+)\)\.render_report_html\(pages=slice\((\d+), \.\.\.\)\)', html)
+        i, j, k = map(int, match.groups())
+        rest = inspector.series(i).levels(j).render_report_html(pages=slice(k, None), max_bytes=None)
+        # the series after the one the note names are rendered from their own views
+        later = inspector.series(slice(i+1, None)).render_report_html(max_bytes=None)
+    assert f'Page {k+1} of' in rest
+    assert 'Output limited' not in rest
+    assert later.count('<summary><b>Series') == 4-(i+1)
+
+def test_window_converts_only_its_pages(synthetic_file):
+    file_path = synthetic_file('pages')
+    with TiffInspector(file_path) as eager:
+        expected = eager.render_report_html(pages=slice(40, 43), max_bytes=None)
+    with TiffInspector(file_path, lazy=True, instrumentation=True) as lazy:
+        lazy.report['series']
+        html = lazy.render_report_html(pages=slice(40, 43), max_bytes=None)
+        counters = lazy.instrumentation.counters
+    assert html == expected
+    assert html.count('<summary><b>Page') == 6 and 'Page 41 of 50' in html and 'Page 44 of' not in html
+    # three pages of each of the two series
+    assert counters['ifds'] == 6
+
+def test_window_after_refresh(tmp_path):
+    file_path = str(tmp_path / 'growing.tif')
+    for k in range(6):
+        tifffile.imwrite(file_path, numpy.zeros((8, 8+k%2), numpy.uint8), append=k > 0, metadata=None)
+    with TiffInspector(file_path, lazy=True) as inspector:
+        for series in inspector.report['series']:
+            series['levels'][0]['pages']
+        tifffile.imwrite(file_path, numpy.zeros((8, 8), numpy.uint8), append=True, metadata=None)
+        inspector.refresh()
+        html = [inspector.render_report_html(pages=window, max_bytes=None) for window in (slice(1, 3), slice(3, 4))]
+    with TiffInspector(file_path) as fresh:
+        assert html == [fresh.render_report_html(pages=window, max_bytes=None) for window in (slice(1, 3), slice(3, 4))]
+
+def test_large_tag_table_is_cut_to_max_bytes(tmp_path):
+    file_path = str(tmp_path / 'tiled.tif')
+    tifffile.imwrite(file_path, numpy.zeros((1024, 1024), numpy.uint8), tile=(16, 16))
+    with TiffInspector(file_path) as inspector:
+        full = inspector.render_report_html(max_bytes=None)
+        html = inspector.render_report_html(max_bytes=5000)
+    assert len(full) > 50000
+    assert len(html) < 7000
+    assert 'more tags left out to stay within max_bytes' in html
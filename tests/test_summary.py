@@ -0,0 +1,55 @@
+import numpy
+import pytest
+import tifffile
+
+import synthetic
+from tiffinspector import TiffInspector, summarize_file
+from tiffinspector.summary import header_series
+
+FIELDS = ('metadata', 'shape', 'dtype', 'series_count', 'page_count')
+
+def report_fields(file_path):
+    with TiffInspector(file_path) as inspector:
+        return dict((key, inspector.report[key]) for key in FIELDS)
+
+@pytest.mark.parametrize('name', sorted(synthetic.GENERATORS))
+def test_summary_matches_report(synthetic_file, name):
+    file_path = synthetic_file(name)
+    assert summarize_file(file_path) == report_fields(file_path)
+
+@pytest.mark.parametrize('planes', [(1, 4, 5), (3, 1, 5), (2, 3, 1), (1, 1, 1)])
+def test_ome_with_singleton_dimensions(tmp_path, planes):
+    file_path = synthetic.ome(str(tmp_path / 'singleton.ome.tif'), planes=planes)
+    with tifffile.TiffFile(file_path) as tiff:
+        # the shape is taken from the OME-XML, not from tifffile's series
+        assert header_series(tiff, len(tiff.pages)) is not None
+    assert summarize_file(file_path) == report_fields(file_path)
+
+def test_ome_with_several_images(tmp_path):
+    file_path = str(tmp_path / 'images.ome.tif')
+    with tifffile.TiffWriter(file_path, ome=True) as tw:
+        tw.write(numpy.zeros((3, 16, 16), numpy.uint16), metadata={'axes': 'ZYX'})
+        tw.write(numpy.zeros((2, 8, 8), numpy.uint8), metadata={'axes': 'CYX'})
+    assert summarize_file(file_path) == report_fields(file_path)
+
+@pytest.mark.parametrize('shapes', [[(4, 8, 8)], [(4, 8, 8), (2, 3, 8, 8)], [(1, 8, 8), (5, 8, 8)]])
+def test_shaped_series(tmp_path, shapes):
+    file_path = str(tmp_path / 'shaped.tif')
+    with tifffile.TiffWriter(file_path) as tw:
+        for shape in shapes:
+            tw.write(numpy.zeros(shape, numpy.uint8))
+    assert summarize_file(file_path) == report_fields(file_path)
+
+def test_uniform_pages(tmp_path):
+    file_path = str(tmp_path / 'uniform.tif')
+    for k in range(12):
+        tifffile.imwrite(file_path, numpy.zeros((8, 8), numpy.float32), append=k > 0, metadata=None)
+    with tifffile.TiffFile(file_path) as tiff:
+        assert header_series(tiff, len(tiff.pages)) == ([12, 8, 8], 'float32', 1)
+    assert summarize_file(file_path) == report_fields(file_path)
+
+def test_lazy_fields_match_summary(synthetic_file):
+    file_path = synthetic_file('ome')
+    with TiffInspector(file_path, lazy=True) as inspector:
+        assert dict((key, inspector.report[key]) for key in FIELDS) == summarize_file(file_path)
+        assert not inspector.report.is_loaded('series')
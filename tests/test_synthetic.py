@@ -0,0 +1,8 @@
+from tiffinspector import TiffInspector
+
+def test_pages_are_tiffpages(synthetic_file):
+    # the 'pages' benchmark case exercises per-page tag conversion only if no page is read as a TiffFrame
+    with TiffInspector(synthetic_file('pages')) as inspector:
+        levels = [level for series in inspector.report['series'] for level in series['levels']]
+    assert sum(level['tiffpage_count'] for level in levels) == 100
+    assert sum(level['tiffframe_count'] for level in levels) == 0
@@ -0,0 +1,93 @@
+import copy, io, json
+
+import numpy
+import pytest
+import tifffile
+
+from tiffinspector import TiffInspector
+from tiffinspector.tags import TagTableCompactor, _iter_pages, compact_report, expand_report, expand_tags
+from tiffinspector.utils import json_default
+
+def dump(report):
+    return json.dumps(report, default=json_default, sort_keys=True)
+
+@pytest.mark.parametrize('name', ['stack', 'pages', 'pyramid', 'ome'])
+def test_compact_expand_round_trip(synthetic_file, name):
+    with TiffInspector(synthetic_file(name)) as inspector:
+        report = inspector.report
+        expected = dump(report)
+        compacted = compact_report(report)
+        # the original report is left as it was
+        assert dump(report) == expected
+        # the compacted report survives JSON, as written by the command line
+        restored = json.loads(json.dumps(compacted, default=json_default))
+        expand_report(restored)
+        assert 'tag_tables' not in restored
+        assert json.dumps(restored, sort_keys=True) == json.dumps(json.loads(expected), sort_keys=True)
+        assert dump(expand_report(copy.deepcopy(compacted))) == expected
+
+def test_pages_share_one_table(synthetic_file):
+    with TiffInspector(synthetic_file('pages')) as inspector:
+        compacted = compact_report(inspector.report)
+    refs = [page['tags'] for page in _iter_pages(compacted)]
+    assert len(refs) == 100 and len(compacted['tag_tables']) == 1
+    assert all(ref['table'] == 0 and 'shift' in ref for ref in refs)
+    assert all(len(ref['diff']) <= len(compacted['tag_tables'][0])//2 for ref in refs)
+
+def rows(offset, width, strip_offset):
+    return [['ImageWidth', '4', offset, 1, width], ['ImageLength', '4', offset+12, 1, 8],
+            ['StripOffsets', '4', offset+24, 1, strip_offset], ['Software', '2', offset+36, 8, 'tifffile']]
+
+def test_compactor():
+    pages = [rows(8, 8, 100), rows(208, 8, 300), rows(408, 8, 500), rows(608, 16, 700), None,
+             [['ImageWidth', '4', 8, 1, 8]]]
+    compactor = TagTableCompactor()
+    refs = [compactor.compact(tags) for tags in pages]
+    assert refs[1] == {'table': 0, 'shift': 200, 'diff': [[2, ['StripOffsets', '4', 1, 300]]]}
+    # two of four rows differ, which is at most max_diff_fraction
+    assert refs[3]['table'] == 0 and len(refs[3]['diff']) == 2
+    assert refs[4] is None
+    assert refs[5]['table'] == 1
+    assert [expand_tags(ref, compactor.tables) for ref in refs] == pages
+
+def test_compactor_valueoffsets():
+    moved = rows(208, 8, 100)
+    moved[3][2] = 1000
+    compactor = TagTableCompactor()
+    refs = [compactor.compact(tags) for tags in [rows(8, 8, 100), moved]]
+    assert refs[1] == {'table': 0, 'valueoffsets': [208, 220, 232, 1000], 'diff': []}
+    assert expand_tags(refs[1], compactor.tables) == moved
+
+def test_compactor_new_table():
+    compactor = TagTableCompactor(max_diff_fraction=0.25)
+    refs = [compactor.compact(tags) for tags in [rows(8, 8, 100), rows(208, 16, 300)]]
+    assert refs[1] == {'table': 1, 'shift': 0, 'diff': []}
+    assert len(compactor.tables) == 2
+
+def test_inspector_expands_compacted_report(synthetic_file):
+    file_path = synthetic_file('pages')
+    with TiffInspector(file_path) as inspector:
+        expected = json.loads(dump(inspector.report))
+        compacted = json.loads(json.dumps(compact_report(inspector.report), default=json_default))
+    with TiffInspector(file_path, report=compacted) as inspector:
+        assert dump(inspector.report) == dump(expected)
+
+def test_streaming_keeps_tag_value_memo_bounded(tmp_path, monkeypatch):
+    import tiffinspector
+    monkeypatch.setattr(tiffinspector, '_TAG_VALUE_MEMO_SIZE', 8)
+    file_path = str(tmp_path / 'tiled.tif')
+    with tifffile.TiffWriter(file_path) as tw:
+        for k in range(40):
+            # alternating widths, so that every page is read as a TiffPage with its own tile offsets
+            tw.write(numpy.zeros((64, 64+16*(k%2)), numpy.uint8), tile=(16, 16), metadata=None)
+    output = io.StringIO()
+    with TiffInspector(file_path, lazy=True) as inspector:
+        inspector.write_report(output, format='jsonl')
+        memo = inspector._tag_values
+        assert 0 < len(memo) <= 8
+        # the tile offsets and byte counts of each page are not kept
+        assert all(key[2] <= 8 for key in memo)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    with TiffInspector(file_path) as inspector:
+        expected = [json.loads(dump(page['tags'])) for page in _iter_pages(inspector.report)]
+    assert [record['tags'] for record in records if record['record'] == 'page'] == expected
@@ -1,17 +1,44 @@
-from ._version import __version__
 
 
-import tifffile, json, sys
+import tifffile, json, sys, time
+from collections import OrderedDict
+from itertools import islice
+import numpy
 from tifffile import TiffPage, TiffFrame
 
 #import xml.sax.saxutils
 
-from typing import List, Tuple
-
-from .report_generator import display_report as report_generator_display_report, get_layout_html, get_layout_text
-from .utils import load_schema, truncate_text_html
-
-from IPython.display import display, HTML
+from typing import Iterable, List, Optional, Tuple, Union
+
+from .report_generator import display_report as report_generator_display_report, render_report_html as report_generator_render_report_html, get_layout_html, get_layout_text, write_layout as report_generator_write_layout
+from .report_writer import write_report as report_writer_write_report
+from .utils import load_schema, extract_metadata, json_default, truncate_text_html
+from .lazy import Deferred, LazyDict
+from .analysis import level_io_stats
+from .pixels import DEFAULT_MAX_PIXEL_BYTES, DEFAULT_SAMPLE_CHUNKS, PIXEL_STATS_MODES, PixelBudget, level_pixel_stats, smallest_level
+from .instrumentation import Instrumentation, NULL_INSTRUMENTATION, timed
+from .summary import series_fields, summarize_file, summary_report
+from .frames import FrameRuns, append_frame
+from .diff import diff_reports
+from .refresh import file_state, resume_points, seed_ifd_chain
+from .cache import ReportCache
+from .tags import LARGE_TAG_VALUE_POLICIES, compact_report, expand_report, is_tag_reference, read_tag_reference, summarize_array, tag_array, tag_reference, tag_selector
+
+# the version (read through importlib.metadata) and the helpers whose modules load multiprocessing and the
+# columnar writers are imported on first access, so that importing the package stays fast for workers that only
+# build reports
+_DEFERRED_EXPORTS = {
+    '__version__': '_version',
+    'inspect_files': 'batch',
+    'ColumnarWriter': 'columnar',
+    'write_columnar': 'columnar'
+}
+
+def __getattr__(name):
+    if name in _DEFERRED_EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f'.{_DEFERRED_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def sampleformat_to_text(sampleformat):
     format_mapping = {
@@ -22,214 +49,577 @@ def sampleformat_to_text(sampleformat):
     }    
     return format_mapping.get(sampleformat, "Unknown format")
 
+_MISSING = object()
+
+# The number of converted tag values an inspector keeps for reuse, so that walking many pages keeps memory bounded
+_TAG_VALUE_MEMO_SIZE = 4096
+
+def _tag_value_key(tag):
+    """
+    Returns a key identifying the value of a tag within one file, or None if the value is not memoized.
+
+    Values of up to 8 entries are identified by the value itself and repeat across pages, e.g. the compression or
+    the tile size. Larger values are located at a different offset on every page, so they are converted anew.
+    """
+    if tag.count <= 8:
+        try:
+            key = (tag.code, int(tag.dtype), tag.count, tag.value)
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    return None
+
+def _copy_report(report):
+    """
+    Copies a report so the copy can be modified without changing the original.
+
+    Eager reports are deep copied through json. Lazy reports are copied one level deep so that subtrees
+    which have not been read from the file yet are not built just to be copied.
+    """
+    if isinstance(report, LazyDict):
+        new_report = report.copy()
+        if new_report.is_loaded('series'):
+            new_report['series'] = [x.copy() if isinstance(x, LazyDict) else json.loads(json.dumps(x, default=json_default)) for x in new_report['series']]
+        return new_report
+    return json.loads(json.dumps(report, default=json_default))
+
 
 
 class TiffInspector:
-    def __init__(self, file_path: str, report: dict = None):
+    def __init__(
+        self,
+        file_path: str,
+        report: dict = None,
+        lazy: bool = False,
+        cache: Union[ReportCache, str, None] = None,
+        tags: Optional[Iterable[Union[str, int]]] = None,
+        exclude_tags: Optional[Iterable[Union[str, int]]] = None,
+        large_tag_values: str = 'list',
+        max_tag_values: int = 1024,
+        io_stats: bool = False,
+        pixel_stats: Union[str, bool] = False,
+        max_pixel_bytes: int = DEFAULT_MAX_PIXEL_BYTES,
+        pixel_sample_chunks: int = DEFAULT_SAMPLE_CHUNKS,
+        instrumentation: Union[Instrumentation, bool, None] = None
+    ):
+        """
+        Inspect the structure of a TIFF file.
+
+        Args:
+            file_path (str): Path to the TIFF file.
+            report (dict): An existing report to copy instead of reading the file. Reports with compacted
+                           'tag_tables' (see compact_report) are expanded.
+            lazy (bool): If True, only the first IFD(s) are read up front, and the series, the levels of each
+                         series and the pages of each level are built from the open TiffFile when that part of
+                         the report is accessed. tifffile reads every IFD of the file when the series are first
+                         accessed.
+            cache (ReportCache or str): A ReportCache, or a directory for one, to restore the report from when the
+                                        file is unchanged. Lazy reports are not stored in the cache since
+                                        building the full report is what lazy mode avoids, and the cache is
+                                        not used with large_tag_values='array' since the JSON entries would
+                                        restore the arrays as lists.
+            tags (list): Names or codes of the tags to extract for each page. None extracts all tags.
+            exclude_tags (list): Names or codes of tags not to extract, e.g. ['TileOffsets', 'TileByteCounts'].
+            large_tag_values (str): How to store the values of tags with more than max_tag_values entries:
+                                    'list' stores every value as a list (the default), 'summarize' stores a dict
+                                    with the count, dtype, min and max, 'array' keeps a NumPy array, and
+                                    'reference' stores only the file offset, dtype and count of the values,
+                                    which tag_value reads on demand from a memory map of the file.
+                                    ASCII tags such as ImageDescription are always stored as text.
+            max_tag_values (int): The number of entries above which large_tag_values applies.
+            io_stats (bool): If True, each level report gets 'io_stats' with the compression ratio, tile size
+                             distribution, on-disk ordering of the tiles or strips and the estimated seeks to
+                             read the level or a region of it (see analysis.level_io_stats).
+            pixel_stats (str or bool): 'sample' (or True) adds 'pixel_stats' to each level report with the min,
+                                       max, mean, histogram and blank tiles of pixel_sample_chunks tiles or
+                                       strips sampled from the level, and 'smallest' adds them to the smallest
+                                       level of each series only, computed from all of its tiles or strips
+                                       (see pixels.level_pixel_stats).
+            max_pixel_bytes (int): The stored bytes of image data that pixel_stats may read from the file, shared
+                                   out between the levels.
+            pixel_sample_chunks (int): The number of tiles or strips sampled per level by pixel_stats='sample'.
+            instrumentation (Instrumentation or bool): An Instrumentation collecting timing spans and counters
+                                                       of the file open, series and level walks, tag conversion,
+                                                       description parsing and rendering, or True for a new one.
+                                                       It is available as self.instrumentation.
+        """
+        if large_tag_values not in LARGE_TAG_VALUE_POLICIES:
+            raise ValueError(f"Unsupported large_tag_values {large_tag_values!r}. Use one of {LARGE_TAG_VALUE_POLICIES}.")
+        if pixel_stats is True:
+            pixel_stats = 'sample'
+        if pixel_stats and pixel_stats not in PIXEL_STATS_MODES:
+            raise ValueError(f"Unsupported pixel_stats {pixel_stats!r}. Use one of {PIXEL_STATS_MODES}.")
         self.file_path = file_path
+        self.lazy = lazy
+        if instrumentation is True:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.io_stats = io_stats
+        self.pixel_options = {
+            'mode': pixel_stats,
+            'max_bytes': max_pixel_bytes,
+            'sample_chunks': pixel_sample_chunks
+        } if pixel_stats else None
+        self.tag_options = {
+            'tags': None if tags is None else list(tags),
+            'exclude_tags': None if exclude_tags is None else list(exclude_tags),
+            'large_tag_values': large_tag_values,
+            'max_tag_values': max_tag_values
+        }
+        self._tag_selected = tag_selector(self.tag_options['tags'], self.tag_options['exclude_tags'])
+        self._tag_values = OrderedDict()
+        self._file_map = None
+        # parsed image descriptions by digest, for rendering (see report_generator.get_description)
+        self._descriptions = {}
+        self._resume_points = {}
+        self._file_state = file_state(file_path)
         #version = get_tiff_version(self.file_path)
-        self.tiff = tifffile.TiffFile(file_path)
+        with self.instrumentation.span('open'):
+            self.tiff = tifffile.TiffFile(file_path)
+        self._owns_tiff = True
+        self._resumable = True
 
         if report is not None:
             # In the case of a report being passed in we are basically copying another object
-            # we force a deep copy on report
-            self.report = json.loads(json.dumps(report))
+            self.report = expand_report(_copy_report(report))
+            self.lazy = isinstance(self.report, LazyDict)
+            # the copied report may have been built with other options, so a refresh walks the whole file
+            self._resumable = False
             return
 
+        if large_tag_values == 'array':
+            cache = None
+        if cache is not None:
+            if not isinstance(cache, ReportCache):
+                cache = ReportCache(cache)
+            cache_options = dict(self.tag_options, io_stats=True) if io_stats else dict(self.tag_options)
+            if self.pixel_options is not None:
+                cache_options['pixel_stats'] = self.pixel_options
+            cache_key = cache.key(file_path, **cache_options)
+            with self.instrumentation.span('cache_get'):
+                cached_report = cache.get(cache_key)
+            if cached_report is not None:
+                self.report = cached_report
+                self.lazy = False
+                return
+
+        self.report = self._build_report()
+
+        if cache is not None and not lazy:
+            with self.instrumentation.span('cache_put'):
+                cache.put(cache_key, self.report)
+
+    def _build_report(self):
         # Get metadata properties to extract programatically
-        tiff_schema = load_schema('tiff_schema')
-        tiff_meta_properties = list(tiff_schema['properties']['metadata']['properties'].keys())
-        self.report = {
-            'metadata':dict([(x,getattr(self.tiff, x)) for x in tiff_meta_properties])
-        }
-        # clean up the automatically read-in data to make sure list-likes are saved json-compatible lists
-        for _property in self.report['metadata'].keys():
-            if isinstance(getattr(self.tiff, _property),tuple): 
-                self.report['metadata'][_property] = list(self.report['metadata'][_property])
-            if isinstance(getattr(self.tiff, _property),set): 
-                self.report['metadata'][_property] = list(self.report['metadata'][_property])
+        report = LazyDict() if self.lazy else {}
+        report['metadata'] = extract_metadata(self.tiff, 'tiff_schema')
+
+        self._pixel_levels = None
+        if self.lazy:
+            # tifffile reads every IFD of the file to build its series, so the series are only built when they
+            # are accessed and the shape, dtype and series count are taken from the first IFD(s) where those
+            # determine them (see summary.series_fields); the page count only scans the IFD chain
+            tiff = self.tiff
+            header = Deferred(lambda: series_fields(tiff, len(tiff.pages)))
+            report.defer('shape', lambda: header.value[0])
+            report.defer('dtype', lambda: header.value[1])
+            report.defer('series', lambda: [self._series_report(series) for series in tiff.series])
+            report.defer('series_count', lambda: header.value[2])
+            report.defer('page_count', lambda: len(tiff.pages))
+            return report
 
         # Get other properties that are either not primary properties of TiffFile, or are the tree-structered child properties
         first_series = self.tiff.series[0]
-        self.report['shape'] = list(first_series.shape)
-        self.report['dtype'] = str(first_series.dtype)
-        self.report['series'] = []
-        self.report['series_count'] = len([x for x in self.tiff.series])
-        self.report['page_count'] = len([x for x in self.tiff.pages])
+        report['shape'] = list(first_series.shape)
+        report['dtype'] = str(first_series.dtype)
+        report['series'] = []
+        report['series_count'] = len(self.tiff.series)
+        report['page_count'] = len([x for x in self.tiff.pages])
 
         # iterate over the series
         for i, series in enumerate(self.tiff.series):
+            report["series"].append(self._series_report(series))
+        return report
+
+    def _pixel_stats_levels(self):
+        # the levels that get pixel statistics, and the byte budget they share, once the series are known
+        if self._pixel_levels is None:
+            if self.pixel_options['mode'] == 'smallest':
+                self._pixel_levels = [smallest_level(series) for series in self.tiff.series]
+            else:
+                self._pixel_levels = [level for series in self.tiff.series for level in series.levels]
+            self._pixel_budget = PixelBudget(self.pixel_options['max_bytes'], len(self._pixel_levels))
+        return self._pixel_levels
 
-            # Get metadata properties to extract programatically
-            series_schema = load_schema('series_schema')
-            series_meta_properties = list(series_schema['properties']['metadata']['properties'].keys())
-            series_report = {
-                'metadata':dict([(x,getattr(series, x)) for x in series_meta_properties])
-            }
-            # clean up the automatically read-in data to make sure list-likes are saved json-compatible lists
-            for _property in series_report['metadata'].keys():
-                if isinstance(getattr(series, _property),tuple): 
-                    series_report['metadata'][_property] = list(series_report['metadata'][_property])
-                if isinstance(getattr(series, _property),set): 
-                    series_report['metadata'][_property] = list(series_report['metadata'][_property])
-            
-            # fix parameters to better fit the json
-            series_report['metadata']['keyframe'] = series_report['metadata']['keyframe'].index
-            series_report['metadata']['dtype'] = str(series_report['metadata']['dtype'])
-            series_report['level_count'] = len(series.levels)
-            series_report['levels'] = []
-
-            # iterate over the levels
-            for j, level in enumerate(series.levels):
-                # Get metadata properties to extract programatically
-                level_schema = load_schema('level_schema')
-                level_meta_properties = list(level_schema['properties']['metadata']['properties'].keys())
-                level_report = {
-                    'metadata':dict([(x,getattr(level, x)) for x in level_meta_properties])
-                }
-                # clean up the automatically read-in data to make sure list-likes are saved json-compatible lists
-                for _property in level_report['metadata'].keys():
-                    if isinstance(getattr(level, _property),tuple): 
-                        level_report['metadata'][_property] = list(level_report['metadata'][_property])
-                    if isinstance(getattr(series, _property),set): 
-                        level_report['metadata'][_property] = list(level_report['metadata'][_property])
-
-                level_report['page_count'] = len(level.pages)
-                level_report['level_index'] = j
-                level_report['tiffpage_count'] = len([x for x in level.pages if isinstance(x,TiffPage)])
-                level_report['tiffframe_count'] = len([x for x in level.pages if isinstance(x,TiffFrame)])
-                level_report['pages'] = []
-
-                page_report = None
-                #level_report['frames'] = []
-
-                # iterate over the pages
-                for k, page in enumerate(level.pages):
-                    if isinstance(page,TiffFrame):
-                        if page_report is None:
-                            raise ValueError("Expected to see a page before TiffFrame")
-                        # get the metadata properties of the TiffFrame
-                        frame_schema = load_schema('frame_schema')
-                        frame_meta_properties = list(frame_schema['properties']['metadata']['properties'].keys())
-                        frame_report = {
-                            'metadata':dict([(x,getattr(page, x)) for x in frame_meta_properties])
-                        }
-
-                        # Fix any list-like for json
-                        for _property in frame_report['metadata'].keys():
-                            if isinstance(getattr(page, _property),tuple): 
-                                frame_report['metadata'][_property] = list(frame_report['metadata'][_property])
-                            if isinstance(getattr(page, _property),set): 
-                                frame_report['metadata'][_property] = list(frame_report['metadata'][_property])
-
-
-                        # Nothing to fix at the moment
-                        page_report['frames'].append(frame_report)
-                        page_report['frame_count'] = len(page_report['frames'])
-                    else:
-                        # If theres a current page we need to store this one in the level
-                        if page_report is not None:
-                            level_report['pages'].append(page_report)
-
-                        # get the metadata properties of the TiffPage
-                        page_schema = load_schema('page_schema')
-                        page_meta_properties = list(page_schema['properties']['metadata']['properties'].keys())
-                        page_report = {
-                            'metadata':dict([(x,getattr(page, x)) for x in page_meta_properties])
-                        }
-
-                        # Fix any list-like for json
-                        for _property in page_report['metadata'].keys():
-                            if isinstance(getattr(page, _property),tuple): 
-                                page_report['metadata'][_property] = list(page_report['metadata'][_property])
-                            if isinstance(getattr(page, _property),set): 
-                                page_report['metadata'][_property] = list(page_report['metadata'][_property])
-
-                        #page_report = dict([(x,getattr(page, x)) for x in page_params])
-                        page_report['metadata']['shape'] = list(page.shape)
-                        page_report['metadata']['dtype'] = str(page.dtype)
-                        page_report['metadata']['hash'] = f"0x{format(page_report['metadata']['hash'] & 0xFFFFFFFF, '08x')}"
-                        page_report['tags'] = self._tiff_tags_to_key_type_value_tuple(page.tags) if hasattr(page,'tags') else None
-                        #page_report['image_description'] = TiffInspector._get_description_text(page.tags) if hasattr(page,'tags') else None
-                        page_report['metadata']['sampleformat'] = sampleformat_to_text(page_report['metadata']['sampleformat'])
-                        page_report['frames'] = []
-                        page_report['frame_count'] = 0
+    @timed('series')
+    def _series_report(self, series):
+        # Get metadata properties to extract programatically
+        series_report = LazyDict() if self.lazy else {}
+        series_report['metadata'] = extract_metadata(series, 'series_schema')
+
+        # fix parameters to better fit the json
+        series_report['metadata']['keyframe'] = series_report['metadata']['keyframe'].index
+        series_report['metadata']['dtype'] = str(series_report['metadata']['dtype'])
+        series_report['level_count'] = len(series.levels)
+
+        # iterate over the levels
+        load_levels = lambda: [self._level_report(level, j) for j, level in enumerate(series.levels)]
+        if self.lazy:
+            series_report.defer('levels', load_levels)
+        else:
+            series_report['levels'] = load_levels()
+        return series_report
+
+    @timed('level')
+    def _level_report(self, level, j):
+        # Get metadata properties to extract programatically
+        level_report = LazyDict() if self.lazy else {}
+        level_report['metadata'] = extract_metadata(level, 'level_schema')
+
+        level_report['page_count'] = len(level.pages)
+        level_report['level_index'] = j
+        if self.lazy:
+            # the counts need every page of the level, so they are deferred along with the pages
+            level_report.defer('tiffpage_count', lambda: len([x for x in level.pages if isinstance(x,TiffPage)]))
+            level_report.defer('tiffframe_count', lambda: len([x for x in level.pages if isinstance(x,TiffFrame)]))
+            level_report.defer('pages', lambda: self._page_reports(level), stream=lambda start, stop: self._iter_page_reports(level, start, stop))
+        else:
+            level_report['tiffpage_count'] = len([x for x in level.pages if isinstance(x,TiffPage)])
+            level_report['tiffframe_count'] = len([x for x in level.pages if isinstance(x,TiffFrame)])
+            level_report['pages'] = self._page_reports(level)
+        if self.io_stats:
+            if self.lazy:
+                level_report.defer('io_stats', lambda: self._level_io_stats(level))
+            else:
+                level_report['io_stats'] = self._level_io_stats(level)
+        if self.pixel_options is not None and any(x is level for x in self._pixel_stats_levels()):
+            if self.lazy:
+                level_report.defer('pixel_stats', lambda: self._level_pixel_stats(level))
+            else:
+                level_report['pixel_stats'] = self._level_pixel_stats(level)
+        return level_report
+
+    @timed('io_stats')
+    def _level_io_stats(self, level):
+        return level_io_stats(level)
+
+    @timed('pixel_stats')
+    def _level_pixel_stats(self, level):
+        sample_chunks = None if self.pixel_options['mode'] == 'smallest' else self.pixel_options['sample_chunks']
+        share = self._pixel_budget.take()
+        stats = level_pixel_stats(level, sample_chunks=sample_chunks, max_bytes=share)
+        self._pixel_budget.spend(share, stats['bytes_read'])
+        self.instrumentation.count('pixel_bytes_read', stats['bytes_read'])
+        return stats
+
+    def _page_reports(self, level):
+        return list(self._iter_page_reports(level))
+
+    def _iter_page_reports(self, level, start=0, stop=None):
+        if not self.instrumentation.enabled:
+            yield from self._walk_pages(level, start, stop)
+            return
+        # the walk of a level is timed without the time its consumer spends between pages
+        pages = self._walk_pages(level, start, stop)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    page_report = next(pages)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter()-start
+                yield page_report
+        finally:
+            self.instrumentation.record('page_walk', elapsed)
+
+    def _walk_pages(self, level, start=0, stop=None):
+        # start and stop select a window of the level's page reports; the pages before it are skipped without
+        # being converted, and the walk ends with the last page report of the window
+        page_report = None
+        #level_report['frames'] = []
+        index = 0
+        position = 0
+
+        # after a refresh, the pages that were already walked are taken from the previous report
+        resume = self._resume_points.get(level.pages[0].offset) if self._resume_points and level.pages else None
+        if resume is not None:
+            kept, position, offset = resume
+            if position < len(level.pages) and isinstance(level.pages[position], TiffPage) and level.pages[position].offset == offset:
+                yield from islice(kept, start, stop)
+                index = len(kept)
+            else:
+                position = 0
+
+        # move on to the page starting the window, each page report starts with a page followed by its frames
+        while index < start and position < len(level.pages):
+            position += 1
+            while position < len(level.pages) and isinstance(level.pages[position], TiffFrame):
+                position += 1
+            index += 1
+
+        # iterate over the pages
+        for page in islice(level.pages, position, None):
+            if isinstance(page,TiffFrame):
+                self.instrumentation.count('ifds')
+                if page_report is None:
+                    raise ValueError("Expected to see a page before TiffFrame")
+                # consecutive frames sharing a layout are stored as a single run
+                append_frame(page_report['frames'], extract_metadata(page, 'frame_schema'))
+                page_report['frame_count'] += 1
+            else:
+                # If theres a current page it is complete once the next page starts
                 if page_report is not None:
-                    level_report["pages"].append(page_report)
-                series_report['levels'].append(level_report)
-            self.report["series"].append(series_report)
+                    yield page_report
+                    index += 1
+                if stop is not None and index >= stop:
+                    return
+                self.instrumentation.count('ifds')
+
+                # get the metadata properties of the TiffPage
+                page_report = {
+                    'metadata':extract_metadata(page, 'page_schema')
+                }
+
+                #page_report = dict([(x,getattr(page, x)) for x in page_params])
+                page_report['metadata']['shape'] = list(page.shape)
+                page_report['metadata']['dtype'] = str(page.dtype)
+                page_report['metadata']['hash'] = f"0x{format(page_report['metadata']['hash'] & 0xFFFFFFFF, '08x')}"
+                page_report['tags'] = self._tiff_tags_to_key_type_value_tuple(page.tags) if hasattr(page,'tags') else None
+                #page_report['image_description'] = TiffInspector._get_description_text(page.tags) if hasattr(page,'tags') else None
+                page_report['metadata']['sampleformat'] = sampleformat_to_text(page_report['metadata']['sampleformat'])
+                page_report['frames'] = []
+                page_report['frame_count'] = 0
+        if page_report is not None:
+            yield page_report
+
+    @classmethod
+    def _view(cls, parent: 'TiffInspector', report: dict) -> 'TiffInspector':
+        """
+        Creates an inspector over a subset of a parent's report without reopening the file.
+
+        The view shares the parent's open TiffFile and every subtree of the report that the selection did not
+        change; only the containers along the changed path are new. Shared subtrees should be treated as
+        read-only, use TiffInspector(file_path, report=view.report) for an independent deep copy.
+        """
+        view = cls.__new__(cls)
+        view.file_path = parent.file_path
+        view.lazy = parent.lazy
+        view.io_stats = parent.io_stats
+        view.pixel_options = parent.pixel_options
+        view.instrumentation = parent.instrumentation
+        view.tag_options = parent.tag_options
+        view._tag_selected = parent._tag_selected
+        view._tag_values = parent._tag_values
+        view._descriptions = parent._descriptions
+        view._file_map = parent._file_map
+        view.tiff = parent.tiff
+        view._owns_tiff = False
+        view.report = report
+        return view
 
     def series(self, series_slice):
         if isinstance(series_slice, slice):
             start, stop, step = series_slice.indices(len(self.report['series']))
-            selected_series = [series for series in self.report['series'][start:stop:step]]
+            selected_series = self.report['series'][start:stop:step]
         elif isinstance(series_slice, int):
             selected_series = [self.report['series'][series_slice]]
         else:
             raise TypeError(f"Unsupported argument type {type(series_slice)}. Use int or slice.")
-        new_report = json.loads(json.dumps(self.report))
+        new_report = self.report.copy()
         new_report['series'] = selected_series
         new_report['series_count'] = len(selected_series)
-        return TiffInspector(file_path = self.file_path, report = new_report)
+        return TiffInspector._view(self, new_report)
 
     def levels(self, levels_slice):
         if isinstance(levels_slice, slice):
-            new_report = json.loads(json.dumps(self.report))
-            new_report['series'] = []
-            for series in self.report['series']:
-                start, stop, step = levels_slice.indices(len(series['levels']))
-                selected_levels = [level for level in series['levels'][start:stop:step]]
-                if selected_levels:  # Only add the series if it contains at least one level
-                    series_copy = series.copy()
-                    series_copy['levels'] = selected_levels
-                    new_report['series'].append(series_copy)
+            select = lambda levels: levels[slice(*levels_slice.indices(len(levels)))]
         elif isinstance(levels_slice, int):
-            new_report = json.loads(json.dumps(self.report))
-            new_report['series'] = []
-            for series in self.report['series']:
-                selected_levels = [series['levels'][levels_slice]]
-                if selected_levels:  # Only add the series if it contains at least one level
-                    series_copy = series.copy()
-                    series_copy['levels'] = selected_levels
-                    new_report['series'].append(series_copy)
+            select = lambda levels: [levels[levels_slice]]
         else:
             raise TypeError(f"Unsupported argument type {type(levels_slice)}. Use int or slice.")
-        new_report = json.loads(json.dumps(new_report))
-        for i, series in enumerate(new_report['series']):
-            new_report['series'][i]['level_count'] = len(series['levels'])
-        return TiffInspector(file_path = self.file_path, report = new_report)
-
-
+        new_report = self.report.copy()
+        new_report['series'] = []
+        for series in self.report['series']:
+            selected_levels = select(series['levels'])
+            if selected_levels:  # Only add the series if it contains at least one level
+                series_copy = series.copy()
+                series_copy['levels'] = selected_levels
+                series_copy['level_count'] = len(selected_levels)
+                new_report['series'].append(series_copy)
+        return TiffInspector._view(self, new_report)
+
+    @timed('summary')
+    def summary(self):
+        """
+        Returns the top-level fields of the report (metadata, shape, dtype, series_count and page_count) computed
+        from the first IFD(s) and a scan of the IFD chain, without walking the pages (see summary.summary_report).
+        When no inspector is needed otherwise, summarize_file(file_path) avoids building the report at all.
+        """
+        return summary_report(self.tiff)
+
+    @timed('refresh')
+    def refresh(self, full: bool = False) -> dict:
+        """
+        Updates the report of a file that has grown since it was inspected, e.g. while pages are being appended.
+
+        The file is reopened and the scan of the IFD chain resumes at the last IFD found before, and for each
+        level only the pages from the last previously walked page on are walked again; the page reports before
+        it are kept as they are. Files read as generic series reuse the TiffPages parsed before, so only the
+        appended IFDs are parsed (see refresh.seed_ifd_chain). For uniform, shaped, OME and other formats,
+        tifffile parses every IFD again when it builds the series, and only building the page reports is
+        skipped. This assumes that pages already written are not rewritten in place, as is the
+        case for files that are only appended to. Views sliced from this inspector before the refresh keep the
+        previous report, and any parts of it that were not loaded can no longer be read.
+
+        Args:
+            full (bool): If True, the whole file is walked again, for files whose existing pages may have changed.
+
+        Returns:
+            dict: The differences between the previous and the new report (see diff.diff_reports). Nothing is read
+                  and the diff is empty when the size and modification time of the file are unchanged.
+        """
+        if not self._owns_tiff:
+            raise ValueError("A view shares its parent's file, refresh the parent inspector instead.")
+        state = file_state(self.file_path)
+        if state == self._file_state and not full:
+            return diff_reports(self.report, self.report)
+        previous_tiff, previous_report = self.tiff, self.report
+        with self.instrumentation.span('open'):
+            tiff = tifffile.TiffFile(self.file_path)
+        try:
+            if self._resumable and not full:
+                seed_ifd_chain(tiff, previous_tiff)
+                self._resume_points = resume_points(previous_report, previous_tiff)
+            else:
+                self._tag_values = OrderedDict()
+            self.tiff = tiff
+            self._file_map = None
+            self.report = self._build_report()
+        except Exception:
+            self.tiff, self.report = previous_tiff, previous_report
+            self._resume_points = {}
+            tiff.close()
+            raise
+        finally:
+            if not self.lazy:
+                # lazy reports keep them for the pages loaded later
+                self._resume_points = {}
+        self._file_state = state
+        self._resumable = True
+        previous_tiff.close()
+        return diff_reports(previous_report, self.report)
+
+    def close(self):
+        """
+        Closes the TiffFile, unless it is shared with the inspector this one was sliced from.
+        """
+        if self._owns_tiff:
+            self.tiff.close()
+        self._file_map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @timed('render_layout_text')
     def __str__(self):
         return get_layout_text(self)
 
+    @timed('render_layout_html')
     def _repr_html_(self):
         return get_layout_html(self)
 
+    @timed('render_layout_text')
     def __repr__(self):
         return get_layout_text(self)
     
+    @timed('render_display')
     def display_report(self,*args,**kwargs):
         return report_generator_display_report(self,*args,**kwargs)
+
+    @timed('render_html')
+    def render_report_html(self,*args,**kwargs):
+        return report_generator_render_report_html(self,*args,**kwargs)
+
+    @timed('write_layout')
+    def write_layout(self,*args,**kwargs):
+        return report_generator_write_layout(self,*args,**kwargs)
+
+    @timed('write_report')
+    def write_report(self,*args,**kwargs):
+        return report_writer_write_report(self,*args,**kwargs)
     
+    def tag_value(self, value):
+        """
+        Resolves a tag value from the report.
+
+        Values stored as references (large_tag_values='reference') are read from a read-only memory map of the
+        file, so only the parts of the file holding the requested values are touched. Other values are
+        returned unchanged.
+
+        Args:
+            value: The value field of a row of a page's 'tags'.
+
+        Returns:
+            The value, with references replaced by a NumPy array of the values.
+
+        Example:
+            >>> inspector = TiffInspector('slide.svs', large_tag_values='reference')
+            >>> tags = dict((x[0], x[4]) for x in inspector.report['series'][0]['levels'][0]['pages'][0]['tags'])
+            >>> inspector.tag_value(tags['TileOffsets'])
+        """
+        if not is_tag_reference(value):
+            return value
+        if self._file_map is None:
+            self._file_map = numpy.memmap(self.file_path, dtype=numpy.uint8, mode='r')
+        return read_tag_reference(value, self._file_map)
+
+    @timed('tag_conversion')
     def _tiff_tags_to_key_type_value_tuple(self, tiff_tags):
         kvt_tuples = []
         for tag in tiff_tags:
             #print(tag.dtype)
-            if isinstance(tag.value, bytes):
-                #print(("BYTES",tag.name))
-                kvt_tuples.append([tag.name,
-                                   str(tag.dtype),
-                                   tag.valueoffset, 
-                                   tag.count, 
-                                   '0x'+tag.value.hex()
-                                  ])
-            elif str(tag.dtype) in ['DATATYPES.RATIONAL','DATATYPES.SRATIONAL']:
-                kvt_tuples.append([tag.name, str(tag.dtype), tag.valueoffset, tag.count, tag.value[0]/tag.value[1]])
+            if not self._tag_selected(tag):
+                continue
+            # small values repeated across pages are converted once and the converted object is shared, keeping
+            # the most recently used _TAG_VALUE_MEMO_SIZE of them
+            key = _tag_value_key(tag)
+            value = _MISSING if key is None else self._tag_values.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._tag_value(tag)
+                self.instrumentation.count('tag_values_converted')
+                if key is not None:
+                    self._tag_values[key] = value
+                    if len(self._tag_values) > _TAG_VALUE_MEMO_SIZE:
+                        self._tag_values.popitem(last=False)
             else:
-                kvt_tuples.append([tag.name,str(tag.dtype), tag.valueoffset, tag.count, list(tag.value) if isinstance(tag.value,tuple) else tag.value])
+                self._tag_values.move_to_end(key)
+            kvt_tuples.append([tag.name, str(tag.dtype), tag.valueoffset, tag.count, value])
         return kvt_tuples
 
+    def _tag_value(self, tag):
+        large_tag_values = self.tag_options['large_tag_values']
+        if large_tag_values == 'reference' and tag.count > self.tag_options['max_tag_values'] and tag.dtype != 2:
+            # only the location of the values is recorded, they are not read from the file
+            return tag_reference(tag, self.tiff.byteorder)
+        elif large_tag_values != 'list' and tag.count > self.tag_options['max_tag_values'] and tag.dtype != 2:
+            # convert large arrays through NumPy instead of allocating a Python object per value
+            values = tag_array(tag, self.tiff)
+            return summarize_array(values) if large_tag_values == 'summarize' else values
+        elif isinstance(tag.value, bytes):
+            #print(("BYTES",tag.name))
+            return '0x'+tag.value.hex()
+        elif str(tag.dtype) in ['DATATYPES.RATIONAL','DATATYPES.SRATIONAL']:
+            return tag.value[0]/tag.value[1]
+        else:
+            return list(tag.value) if isinstance(tag.value,tuple) else tag.value
+
     @classmethod
     def _get_description_text(cls, tiff_tags):
         kvt_tuples = []
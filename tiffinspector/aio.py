@@ -0,0 +1,187 @@
+import asyncio, json, os, sys, time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Iterable, Optional
+
+from .batch import expand_paths
+from .tags import compact_report
+
+def _inspect_report(file_path: str, compact_tags: bool = False, **kwargs) -> dict:
+    # runs in the executor; module level so that process pools can pickle it
+    from . import TiffInspector
+
+    with TiffInspector(file_path, **kwargs) as inspector:
+        return compact_report(inspector.report) if compact_tags else inspector.report
+
+class AsyncInspector:
+    """
+    Builds TiffInspector reports for asyncio code without blocking the event loop.
+
+    Reports are built eagerly in a bounded executor, and the file is closed before the report is returned.
+    Concurrent requests for the same file with the same options share one parse, and every waiter receives the
+    same report object, which should be treated as read-only. Timeouts and cancellation apply to each waiter:
+    a parse that has not started yet is dropped once nobody waits for it, while a parse already running in a
+    worker thread finishes in the background and its result is discarded.
+
+    Example:
+        >>> async with AsyncInspector(max_workers=8) as inspector:
+        ...     report = await inspector.inspect('slide.svs', timeout=30)
+        ...     async for record in inspector.inspect_many(['/data/*.svs'], timeout=30):
+        ...         print(record['file_path'], 'error' in record)
+    """
+    def __init__(self, max_workers: Optional[int] = 4, executor: Optional[Executor] = None):
+        """
+        Args:
+            max_workers (int): The number of worker threads of the executor created when none is given.
+            executor (Executor): An executor to run the inspections in instead, e.g. a ProcessPoolExecutor.
+                                 It is not shut down by close().
+        """
+        self.max_workers = max_workers
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers, thread_name_prefix='tiffinspector')
+        # in-flight parses: key -> [future, number of waiters]
+        self._jobs = {}
+
+    def _key(self, loop, file_path, compact_tags, kwargs):
+        options = json.dumps(kwargs, sort_keys=True, default=repr)
+        return (id(loop), os.path.realpath(file_path), compact_tags, options)
+
+    async def inspect(self, file_path: str, timeout: Optional[float] = None, compact_tags: bool = False, **kwargs) -> dict:
+        """
+        Returns the report of a file.
+
+        Args:
+            file_path (str): The path of the TIFF file.
+            timeout (float): Seconds to wait for the report before raising asyncio.TimeoutError. None waits.
+            compact_tags (bool): If True, the page tags are compacted into shared 'tag_tables'.
+            **kwargs: Passed to TiffInspector. Lazy reports need the open file, so lazy is not supported.
+
+        Returns:
+            dict: The report.
+        """
+        if kwargs.get('lazy'):
+            raise ValueError("AsyncInspector builds reports eagerly, lazy=True is not supported")
+        loop = asyncio.get_running_loop()
+        key = self._key(loop, file_path, compact_tags, kwargs)
+        job = self._jobs.get(key)
+        if job is None:
+            future = loop.run_in_executor(self._executor, partial(_inspect_report, file_path, compact_tags, **kwargs))
+            job = self._jobs[key] = [future, 0]
+            future.add_done_callback(lambda _: self._jobs.pop(key, None) if self._jobs.get(key) is job else None)
+        future = job[0]
+        job[1] += 1
+        try:
+            # the shield keeps one waiter's timeout or cancellation from cancelling the parse for the others
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            job[1] -= 1
+            if not job[1] and not future.done():
+                # nobody waits for the report any more
+                future.cancel()
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+
+    async def _record(self, file_path, timeout, compact_tags, kwargs):
+        start = time.perf_counter()
+        try:
+            report = await self.inspect(file_path, timeout, compact_tags, **kwargs)
+            return {'file_path': file_path, 'elapsed': time.perf_counter() - start, 'report': report}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {'file_path': file_path, 'elapsed': time.perf_counter() - start,
+                    'error': {'type': type(e).__name__, 'message': str(e)}}
+
+    async def inspect_many(
+        self,
+        paths: Iterable[str],
+        timeout: Optional[float] = None,
+        ordered: bool = False,
+        max_pending: Optional[int] = None,
+        compact_tags: bool = False,
+        **kwargs
+    ) -> AsyncIterator[dict]:
+        """
+        Inspects many files, yielding a batch record for each file as it finishes.
+
+        Args:
+            paths: File paths and/or glob patterns (see batch.expand_paths).
+            timeout (float): Seconds to wait for each file. A file that times out gets an error record.
+            ordered (bool): If True, records are yielded in input order rather than as soon as they finish.
+            max_pending (int): The number of files requested at a time. None uses twice max_workers.
+            compact_tags (bool): If True, each report's page tags are compacted into shared 'tag_tables'.
+            **kwargs: Passed to TiffInspector for each file.
+
+        Yields:
+            dict: {'file_path', 'elapsed', 'report'} or {'file_path', 'elapsed', 'error'} as in
+                  batch.inspect_file. Closing the iterator early cancels the files still pending.
+        """
+        file_paths = iter(expand_paths(paths))
+        max_pending = max_pending or 2*(self.max_workers or os.cpu_count() or 1)
+        pending = deque()
+        def submit():
+            for file_path in file_paths:
+                pending.append(asyncio.ensure_future(self._record(file_path, timeout, compact_tags, kwargs)))
+                if len(pending) >= max_pending:
+                    break
+        try:
+            submit()
+            while pending:
+                if ordered:
+                    task = pending.popleft()
+                    record = await task
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    task = next(x for x in pending if x in done)
+                    pending.remove(task)
+                    record = task.result()
+                submit()
+                yield record
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self) -> None:
+        """
+        Shuts down the executor created by this inspector, dropping the parses that have not started.
+        """
+        if self._owns_executor:
+            if sys.version_info >= (3, 9):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+_default_inspector = None
+
+def _get_default_inspector() -> AsyncInspector:
+    global _default_inspector
+    if _default_inspector is None:
+        _default_inspector = AsyncInspector()
+    return _default_inspector
+
+async def inspect_async(file_path: str, timeout: Optional[float] = None, **kwargs) -> dict:
+    """
+    Returns the report of a file without blocking the event loop, using a shared AsyncInspector.
+
+    See AsyncInspector.inspect for the arguments.
+    """
+    return await _get_default_inspector().inspect(file_path, timeout, **kwargs)
+
+def inspect_files_async(paths: Iterable[str], timeout: Optional[float] = None, **kwargs) -> AsyncIterator[dict]:
+    """
+    Inspects many files without blocking the event loop, using a shared AsyncInspector.
+
+    See AsyncInspector.inspect_many for the arguments.
+
+    Example:
+        >>> async for record in inspect_files_async(['/data/*.svs'], timeout=30):
+        ...     print(record['file_path'])
+    """
+    return _get_default_inspector().inspect_many(paths, timeout, **kwargs)
@@ -0,0 +1,177 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy
+
+# Region shape, in pixels (height, width), used to estimate the cost of reading part of a level
+DEFAULT_IO_REGION = (1024, 1024)
+
+def _window_sum(values: numpy.ndarray, width: int, axis: int, windows: int) -> numpy.ndarray:
+    # sums of `width` consecutive entries along an axis, for the first `windows` start positions
+    if width <= 0:
+        shape = list(values.shape)
+        shape[axis] = windows
+        return numpy.zeros(shape, numpy.int64)
+    shape = list(values.shape)
+    shape[axis] += 1
+    cumsum = numpy.zeros(shape, numpy.int64)
+    index = [slice(None)]*len(shape)
+    index[axis] = slice(1, None)
+    numpy.cumsum(values, axis=axis, out=cumsum[tuple(index)])
+    index[axis] = slice(width, width+windows)
+    stop = cumsum[tuple(index)]
+    index[axis] = slice(0, windows)
+    return stop-cumsum[tuple(index)]
+
+def _breaks(offsets: numpy.ndarray, ends: numpy.ndarray, max_gap: int) -> numpy.ndarray:
+    # True where reading the chunk at `offsets` right after the chunk ending at `ends` needs a seek
+    gap = offsets-ends
+    return (gap < 0) | (gap > max_gap)
+
+def chunk_size_stats(bytecounts: numpy.ndarray) -> dict:
+    """
+    Summarizes the distribution of the stored sizes of the tiles or strips of a level.
+
+    Returns:
+        dict: The count, number of empty chunks (byte count 0, e.g. sparse tiles), min, max, mean, standard
+              deviation and the 5th, 50th and 95th percentiles of the byte counts.
+    """
+    if not bytecounts.size:
+        return {'count': 0, 'empty': 0, 'min': None, 'max': None, 'mean': None, 'std': None,
+                'p5': None, 'p50': None, 'p95': None}
+    p5, p50, p95 = numpy.percentile(bytecounts, [5, 50, 95])
+    return {
+        'count': int(bytecounts.size),
+        'empty': int(numpy.count_nonzero(bytecounts == 0)),
+        'min': int(bytecounts.min()),
+        'max': int(bytecounts.max()),
+        'mean': float(bytecounts.mean()),
+        'std': float(bytecounts.std()),
+        'p5': float(p5),
+        'p50': float(p50),
+        'p95': float(p95)
+    }
+
+def chunk_io_stats(
+    offsets: numpy.ndarray,
+    bytecounts: numpy.ndarray,
+    grid_shape: Tuple[int, int],
+    chunk_shape: Tuple[int, int],
+    uncompressed_bytes: Optional[int] = None,
+    region: Sequence[int] = DEFAULT_IO_REGION,
+    max_gap: int = 0
+) -> dict:
+    """
+    Computes layout statistics and read cost estimates from the offsets and byte counts of a level's chunks.
+
+    The chunks (tiles or strips) are taken in index order, as planes of grid_shape chunks stored row by row. A
+    seek is counted whenever the next chunk to read does not start within max_gap bytes after the end of the
+    previous one, so max_gap models readers that read through small gaps instead of seeking.
+
+    Args:
+        offsets (numpy.ndarray): The file offsets of the chunks, e.g. TileOffsets of every page of the level.
+        bytecounts (numpy.ndarray): The stored sizes of the chunks, e.g. TileByteCounts.
+        grid_shape (tuple): The number of chunk rows and chunk columns in one plane.
+        chunk_shape (tuple): The height and width of one chunk in pixels.
+        uncompressed_bytes (int): The decoded size of the level, for the compression ratio.
+        region (tuple): The height and width in pixels of the region used for the region read estimate.
+        max_gap (int): The largest gap in bytes between two chunks that is read through instead of sought over.
+
+    Returns:
+        dict: 'chunk_count', 'stored_bytes', 'uncompressed_bytes', 'compression_ratio', 'chunk_bytes' (see
+              chunk_size_stats), 'sequential_fraction' (adjacent chunks in index order that need no seek),
+              'forward_fraction' (adjacent chunks in index order that do not go backwards in the file),
+              'gap_bytes' (bytes between the first and last chunk not holding chunk data), 'full_read' with the
+              seeks for reading every chunk in index order and in file order, and 'region' with the mean and
+              maximum chunks, bytes and seeks for reading a region at every chunk-aligned position.
+    """
+    offsets = numpy.asarray(offsets, numpy.int64).reshape(-1)
+    bytecounts = numpy.asarray(bytecounts, numpy.int64).reshape(-1)
+    ends = offsets+bytecounts
+    stored_bytes = int(bytecounts.sum())
+    stats = {
+        'chunk_count': int(offsets.size),
+        'stored_bytes': stored_bytes,
+        'uncompressed_bytes': uncompressed_bytes,
+        'compression_ratio': uncompressed_bytes/stored_bytes if uncompressed_bytes is not None and stored_bytes else None,
+        'chunk_bytes': chunk_size_stats(bytecounts)
+    }
+    # chunks without data are not read
+    stored = bytecounts > 0
+    if offsets.size > 1:
+        stats['sequential_fraction'] = float(numpy.mean(~_breaks(offsets[1:], ends[:-1], 0)))
+        stats['forward_fraction'] = float(numpy.mean(offsets[1:] >= offsets[:-1]))
+    else:
+        stats['sequential_fraction'] = stats['forward_fraction'] = None
+    stored_offsets, stored_ends = offsets[stored], ends[stored]
+    if stored_offsets.size:
+        stats['gap_bytes'] = max(0, int(stored_ends.max()-stored_offsets.min())-stored_bytes)
+        order = numpy.argsort(stored_offsets, kind='stable')
+        sorted_offsets, sorted_ends = stored_offsets[order], stored_ends[order]
+        stats['full_read'] = {
+            'seeks_index_order': 1+int(numpy.count_nonzero(_breaks(stored_offsets[1:], stored_ends[:-1], max_gap))),
+            'seeks_file_order': 1+int(numpy.count_nonzero(_breaks(sorted_offsets[1:], sorted_ends[:-1], max_gap)))
+        }
+    else:
+        stats['gap_bytes'] = 0
+        stats['full_read'] = {'seeks_index_order': 0, 'seeks_file_order': 0}
+    stats['region'] = _region_stats(offsets, ends, bytecounts, grid_shape, chunk_shape, region, max_gap)
+    return stats
+
+def _region_stats(offsets, ends, bytecounts, grid_shape, chunk_shape, region, max_gap) -> Optional[dict]:
+    rows, cols = grid_shape
+    if not rows or not cols or offsets.size % (rows*cols):
+        return None
+    shape = (-1, rows, cols)
+    offsets, ends, bytecounts = offsets.reshape(shape), ends.reshape(shape), bytecounts.reshape(shape)
+    # the number of chunk rows and columns covered by a chunk-aligned region
+    r = min(rows, max(1, -(-int(region[0])//max(1, chunk_shape[0]))))
+    c = min(cols, max(1, -(-int(region[1])//max(1, chunk_shape[1]))))
+    windows = (rows-r+1, cols-c+1)
+    # seeks within each chunk row of the region, then from the end of one row of the region to the next
+    row_breaks = _breaks(offsets[:, :, 1:], ends[:, :, :-1], max_gap)
+    within_rows = _window_sum(_window_sum(row_breaks, c-1, 2, windows[1]), r, 1, windows[0])
+    row_changes = _breaks(offsets[:, 1:, :cols-c+1], ends[:, :-1, c-1:], max_gap)
+    between_rows = _window_sum(row_changes, r-1, 1, windows[0])
+    seeks = 1+within_rows+between_rows
+    region_bytes = _window_sum(_window_sum(bytecounts, c, 2, windows[1]), r, 1, windows[0])
+    return {
+        'shape': [int(region[0]), int(region[1])],
+        'chunks': r*c,
+        'bytes_mean': float(region_bytes.mean()),
+        'bytes_max': int(region_bytes.max()),
+        'seeks_mean': float(seeks.mean()),
+        'seeks_max': int(seeks.max())
+    }
+
+def level_io_stats(level, region: Sequence[int] = DEFAULT_IO_REGION, max_gap: int = 0) -> dict:
+    """
+    Computes the tile or strip layout statistics and read cost estimates of a pyramid level.
+
+    The offsets and byte counts come from the TileOffsets/TileByteCounts (or StripOffsets/StripByteCounts) of
+    every page and frame of the level, which tifffile reads while parsing the IFDs, so no image data is read.
+
+    Args:
+        level: The tifffile TiffPageSeries of the level.
+        region (tuple): The height and width in pixels of the region used for the region read estimate.
+        max_gap (int): The largest gap in bytes between two chunks that is read through instead of sought over.
+
+    Returns:
+        dict: 'is_tiled', 'chunk_shape' and 'grid_shape' of one plane, followed by the fields of chunk_io_stats.
+    """
+    pages = [page for page in level.pages if page is not None]
+    keyframe = level.keyframe
+    if keyframe.is_tiled:
+        chunk_shape = (keyframe.tilelength, keyframe.tilewidth)
+    else:
+        chunk_shape = (min(keyframe.rowsperstrip or keyframe.imagelength, keyframe.imagelength), keyframe.imagewidth)
+    grid_shape = (-(-keyframe.imagelength//max(1, chunk_shape[0])), -(-keyframe.imagewidth//max(1, chunk_shape[1])))
+    offsets = numpy.concatenate([numpy.asarray(page.dataoffsets, numpy.int64) for page in pages])
+    bytecounts = numpy.concatenate([numpy.asarray(page.databytecounts, numpy.int64) for page in pages])
+    stats = {
+        'is_tiled': bool(keyframe.is_tiled),
+        'chunk_shape': list(chunk_shape),
+        'grid_shape': list(grid_shape)
+    }
+    stats.update(chunk_io_stats(offsets, bytecounts, grid_shape, chunk_shape,
+                                uncompressed_bytes=sum(page.nbytes for page in pages), region=region, max_gap=max_gap))
+    return stats
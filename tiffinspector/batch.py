@@ -0,0 +1,109 @@
+import glob, json, time
+from functools import partial
+from multiprocessing import Pool
+from typing import IO, Iterable, Iterator, List, Optional
+
+from .tags import compact_report
+from .utils import json_default
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """
+    Expands glob patterns in a list of paths.
+
+    Patterns are expanded recursively ('**' matches any number of directories) and sorted. Paths that contain
+    no glob characters are kept as they are even if they do not exist, so that they are reported as failures
+    rather than silently dropped. Duplicates are removed keeping the first occurrence.
+
+    Args:
+        paths: File paths and/or glob patterns.
+
+    Returns:
+        The list of file paths to inspect.
+    """
+    expanded = []
+    for path in paths:
+        if any(c in path for c in '*?['):
+            expanded.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            expanded.append(path)
+    return list(dict.fromkeys(expanded))
+
+def inspect_file(file_path: str, compact_tags: bool = False, **kwargs) -> dict:
+    """
+    Inspects one file and returns a batch record instead of raising on failure.
+
+    Args:
+        file_path: The path of the TIFF file.
+        compact_tags: If True, the report's page tags are compacted into shared 'tag_tables'
+                      (see tags.compact_report).
+        **kwargs: Passed to TiffInspector.
+
+    Returns:
+        dict: {'file_path', 'elapsed', 'report'} on success or {'file_path', 'elapsed', 'error'} on failure,
+              where 'error' holds the exception 'type' and 'message'.
+    """
+    from . import TiffInspector
+
+    start = time.perf_counter()
+    try:
+        with TiffInspector(file_path, **kwargs) as inspector:
+            report = compact_report(inspector.report) if compact_tags else inspector.report
+        return {'file_path': file_path, 'elapsed': time.perf_counter() - start, 'report': report}
+    except Exception as e:
+        return {'file_path': file_path, 'elapsed': time.perf_counter() - start,
+                'error': {'type': type(e).__name__, 'message': str(e)}}
+
+def inspect_files(
+    paths: Iterable[str],
+    processes: Optional[int] = None,
+    ordered: bool = False,
+    chunksize: int = 1,
+    compact_tags: bool = False,
+    **kwargs
+) -> Iterator[dict]:
+    """
+    Inspects many files across a process pool, yielding a record for each file as it finishes.
+
+    Args:
+        paths: File paths and/or glob patterns (see expand_paths).
+        processes: The number of worker processes. None uses os.cpu_count(); 0 or 1 inspects the files
+                   serially in the current process.
+        ordered: If True, records are yielded in input order rather than as soon as they finish.
+        chunksize: The number of files handed to a worker at a time.
+        compact_tags: If True, each report's page tags are compacted into shared 'tag_tables'.
+        **kwargs: Passed to TiffInspector for each file.
+
+    Yields:
+        dict: The record returned by inspect_file for each file. A file that fails does not stop the batch.
+    """
+    file_paths = expand_paths(paths)
+    worker = partial(inspect_file, compact_tags=compact_tags, **kwargs)
+    if processes is not None and processes <= 1:
+        for file_path in file_paths:
+            yield worker(file_path)
+        return
+    with Pool(processes) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for record in imap(worker, file_paths, chunksize):
+            yield record
+
+def write_jsonl(records: Iterable[dict], fp: IO[str]) -> dict:
+    """
+    Writes batch records as JSON Lines, one record per line, flushing after each record.
+
+    Args:
+        records: The records from inspect_files.
+        fp: A text file object to write to.
+
+    Returns:
+        dict: The number of 'files' written and of 'failures' among them.
+    """
+    counts = {'files': 0, 'failures': 0}
+    for record in records:
+        fp.write(json.dumps(record, default=json_default))
+        fp.write('\n')
+        fp.flush()
+        counts['files'] += 1
+        if 'error' in record:
+            counts['failures'] += 1
+    return counts
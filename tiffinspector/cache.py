@@ -0,0 +1,175 @@
+import hashlib, json, os, struct, tempfile
+from typing import Any, Optional
+
+from .tags import compact_report, expand_report
+from .utils import json_default
+
+# Bump when the structure of the report changes so that stale entries are not restored
+REPORT_FORMAT_VERSION = 1
+
+def first_ifd_digest(file_path: str) -> str:
+    """
+    Hashes the TIFF header and the first IFD (tag count, tag entries and the offset of the next IFD).
+
+    This catches files that were rewritten in place with the same size and modification time, without reading
+    anything beyond the first IFD.
+
+    Args:
+        file_path (str): The path of the TIFF file.
+
+    Returns:
+        str: The hex SHA-1 digest of the header and first IFD block.
+
+    Raises:
+        ValueError: If the file does not start with a TIFF or BigTIFF header.
+    """
+    with open(file_path, 'rb') as fh:
+        header = fh.read(16)
+        byteorder = {b'II': '<', b'MM': '>'}.get(header[:2])
+        if byteorder is None:
+            raise ValueError(f"{file_path} is not a TIFF file")
+        version = struct.unpack(byteorder+'H', header[2:4])[0]
+        if version == 42:
+            offset = struct.unpack(byteorder+'I', header[4:8])[0]
+            header = header[:8]
+            tagnoformat, tagsize, offsetsize = 'H', 12, 4
+        elif version == 43:
+            offset = struct.unpack(byteorder+'Q', header[8:16])[0]
+            tagnoformat, tagsize, offsetsize = 'Q', 20, 8
+        else:
+            raise ValueError(f"{file_path} is not a TIFF file")
+        fh.seek(offset)
+        tagno_bytes = fh.read(struct.calcsize(tagnoformat))
+        tagno = struct.unpack(byteorder+tagnoformat, tagno_bytes)[0]
+        block = fh.read(tagno*tagsize+offsetsize)
+    return hashlib.sha1(header+tagno_bytes+block).hexdigest()
+
+class ReportCache:
+    """
+    An on-disk cache of TiffInspector reports with size-bounded least-recently-used eviction.
+
+    Entries are keyed by the file's real path, size and modification time (and optionally a hash of its first
+    IFD) together with the options the report was built with. Each entry is a JSON file in the cache directory,
+    with the page tags compacted into shared tables; its modification time records when it was last used.
+
+    Example:
+        >>> cache = ReportCache('~/.cache/tiffinspector', max_bytes=2**30)
+        >>> inspector = TiffInspector('slide.svs', cache=cache)
+    """
+    def __init__(self, directory: str, max_bytes: Optional[int] = 1024**3, hash_first_ifd: bool = False):
+        """
+        Args:
+            directory (str): The directory storing the cache entries. It is created if needed.
+            max_bytes (int): The maximum total size of the entries. None disables eviction.
+            hash_first_ifd (bool): If True, the key also includes a hash of the header and first IFD.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hash_first_ifd = hash_first_ifd
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, file_path: str, **options: Any) -> str:
+        """
+        Computes the cache key of a file.
+
+        Args:
+            file_path (str): The path of the TIFF file.
+            **options: Options that change the content of the report, e.g. the tag selection.
+
+        Returns:
+            str: A hex digest identifying the file contents and report options.
+        """
+        from ._version import __version__
+
+        stat = os.stat(file_path)
+        identity = {
+            'path': os.path.realpath(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'format': REPORT_FORMAT_VERSION,
+            'version': __version__,
+            'options': options
+        }
+        if self.hash_first_ifd:
+            identity['first_ifd'] = first_ifd_digest(file_path)
+        return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached report for a key, or None if there is no usable entry.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as fp:
+                report = json.load(fp)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        report = expand_report(report)
+        # mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return report
+
+    def put(self, key: str, report: dict) -> None:
+        """
+        Stores a report, then evicts least recently used entries until the cache fits in max_bytes.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(compact_report(report), fp, default=json_default)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def size(self) -> int:
+        """
+        Returns the total size in bytes of the cached entries.
+        """
+        return sum(x[1] for x in self._entries())
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the total size is at most max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(x[1] for x in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
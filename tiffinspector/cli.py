@@ -0,0 +1,139 @@
+import argparse, json, sys
+from typing import List, Optional
+
+from .columnar import COLUMNAR_FORMATS
+from .pixels import DEFAULT_MAX_PIXEL_BYTES, DEFAULT_SAMPLE_CHUNKS, PIXEL_STATS_MODES
+from .tags import LARGE_TAG_VALUE_POLICIES
+
+def _report_options(args: argparse.Namespace) -> dict:
+    return {
+        'tags': args.tags,
+        'exclude_tags': args.exclude_tags,
+        'large_tag_values': args.large_tag_values,
+        'max_tag_values': args.max_tag_values,
+        'io_stats': args.io_stats,
+        'pixel_stats': args.pixel_stats or False,
+        'max_pixel_bytes': int(args.max_pixel_mb*1024**2),
+        'pixel_sample_chunks': args.pixel_sample_chunks
+    }
+
+def _batch(args: argparse.Namespace) -> int:
+    from .batch import inspect_files, write_jsonl
+
+    records = inspect_files(args.paths, processes=args.processes, ordered=args.ordered, chunksize=args.chunksize,
+                            compact_tags=args.compact_tags, **_report_options(args))
+    if args.output == '-':
+        counts = write_jsonl(records, sys.stdout)
+    else:
+        with open(args.output, 'w') as fp:
+            counts = write_jsonl(records, fp)
+    print(f"inspected {counts['files']} files, {counts['failures']} failed", file=sys.stderr)
+    return 1 if counts['failures'] else 0
+
+def _columnar(args: argparse.Namespace) -> int:
+    from .columnar import write_columnar
+
+    counts = write_columnar(args.paths, args.output, format=args.format, processes=args.processes,
+                            **_report_options(args))
+    print(f"inspected {counts['files']} files, {counts['failures']} failed", file=sys.stderr)
+    return 1 if counts['failures'] else 0
+
+def _report(args: argparse.Namespace) -> int:
+    from . import TiffInspector
+
+    with TiffInspector(args.path, lazy=not args.eager, **_report_options(args)) as inspector:
+        if args.output == '-':
+            inspector.write_report(sys.stdout, format=args.format, compact_tags=args.compact_tags)
+        else:
+            with open(args.output, 'w') as fp:
+                inspector.write_report(fp, format=args.format, compact_tags=args.compact_tags)
+    return 0
+
+def _summary(args: argparse.Namespace) -> int:
+    from .batch import expand_paths
+    from .summary import summarize_file
+    from .utils import json_default
+
+    failures = 0
+    fp = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for file_path in expand_paths(args.paths):
+            try:
+                record = {'file_path': file_path, 'summary': summarize_file(file_path)}
+            except Exception as e:
+                failures += 1
+                record = {'file_path': file_path, 'error': {'type': type(e).__name__, 'message': str(e)}}
+            fp.write(json.dumps(record, default=json_default))
+            fp.write('\n')
+    finally:
+        if fp is not sys.stdout:
+            fp.close()
+    return 1 if failures else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tiff-inspector', description='Inspect the structure and metadata of TIFF files.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_options = argparse.ArgumentParser(add_help=False)
+    report_options.add_argument('--tags', nargs='+', default=None, help='Names or codes of the only tags to extract.')
+    report_options.add_argument('--exclude-tags', nargs='+', default=None, help='Names or codes of tags not to extract.')
+    report_options.add_argument('--large-tag-values', choices=LARGE_TAG_VALUE_POLICIES, default='list',
+                             help='How to store tags with more than --max-tag-values entries (default: list).')
+    report_options.add_argument('--max-tag-values', type=int, default=1024,
+                             help='Number of entries above which --large-tag-values applies (default: 1024).')
+    report_options.add_argument('--compact-tags', action='store_true',
+                             help='Write identical tag tables once, with per-page differences.')
+    report_options.add_argument('--io-stats', action='store_true',
+                             help='Add tile/strip layout statistics and read cost estimates to each level.')
+    report_options.add_argument('--pixel-stats', choices=PIXEL_STATS_MODES, default=None,
+                             help='Add min/max/mean, a histogram and blank tiles to each level from sampled tiles, '
+                                  'or to the smallest level of each series from all of its tiles.')
+    report_options.add_argument('--max-pixel-mb', type=float, default=DEFAULT_MAX_PIXEL_BYTES/1024**2,
+                             help='Megabytes of image data --pixel-stats may read per file (default: 64).')
+    report_options.add_argument('--pixel-sample-chunks', type=int, default=DEFAULT_SAMPLE_CHUNKS,
+                             help='Tiles or strips sampled per level by --pixel-stats sample (default: 16).')
+
+    batch = subparsers.add_parser('batch', parents=[report_options],
+                                  help='Inspect many files in parallel and write the reports as JSON Lines.')
+    batch.add_argument('paths', nargs='+', help="TIFF files or glob patterns (quote patterns to use '**').")
+    batch.add_argument('-p', '--processes', type=int, default=None,
+                       help='Number of worker processes (default: number of CPUs, 1 runs serially).')
+    batch.add_argument('-o', '--output', default='-', help='Output JSON Lines file (default: stdout).')
+    batch.add_argument('--ordered', action='store_true', help='Write records in input order instead of as they finish.')
+    batch.add_argument('--chunksize', type=int, default=1, help='Files handed to a worker at a time.')
+    batch.set_defaults(func=_batch)
+
+    columnar = subparsers.add_parser('columnar', parents=[report_options],
+                                     help='Inspect many files in parallel and append their pages and tags to '
+                                          'columnar tables (needs pyarrow).')
+    columnar.add_argument('paths', nargs='+', help="TIFF files or glob patterns (quote patterns to use '**').")
+    columnar.add_argument('-o', '--output', required=True,
+                          help='Output directory of the files, pages and tags tables, appended to if it exists.')
+    columnar.add_argument('-f', '--format', choices=COLUMNAR_FORMATS, default='parquet',
+                          help='Parquet, or the Arrow IPC file format (default: parquet).')
+    columnar.add_argument('-p', '--processes', type=int, default=None,
+                          help='Number of worker processes (default: number of CPUs, 1 runs serially).')
+    columnar.set_defaults(func=_columnar)
+
+    report = subparsers.add_parser('report', parents=[report_options], help='Write the report of one file, streaming it page by page.')
+    report.add_argument('path', help='TIFF file.')
+    report.add_argument('-f', '--format', choices=['json', 'jsonl'], default='json',
+                        help='A single JSON document, or JSON Lines with one record per file, series, level and page.')
+    report.add_argument('-o', '--output', default='-', help='Output file (default: stdout).')
+    report.add_argument('--eager', action='store_true',
+                        help='Build the whole report before writing instead of reading pages as they are written.')
+    report.set_defaults(func=_report)
+
+    summary = subparsers.add_parser('summary', help='Write the shape, dtype, series and page counts of files as JSON Lines, '
+                                                    'read from the first IFDs without walking every page.')
+    summary.add_argument('paths', nargs='+', help="TIFF files or glob patterns (quote patterns to use '**').")
+    summary.add_argument('-o', '--output', default='-', help='Output JSON Lines file (default: stdout).')
+    summary.set_defaults(func=_summary)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the tiff-inspector command.
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
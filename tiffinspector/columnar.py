@@ -0,0 +1,380 @@
+import json, numbers, os, re
+from enum import Enum
+from typing import Iterable, Optional
+
+import numpy
+
+from .batch import inspect_files
+from .lazy import iter_items
+from .tags import expand_report
+from .utils import json_default, load_schema
+
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+_INT64_RANGE = (-2**63, 2**63)
+
+def _pyarrow():
+    # pyarrow is an optional dependency, only needed to export reports to columnar tables
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Columnar export needs pyarrow, install it with 'pip install tiff-inspector[columnar]'.") from e
+    return pyarrow
+
+def _schema_kind(schema: dict) -> str:
+    # the column kind of a metadata field from its JSON schema, nullable fields take the type of the other option
+    options = [x for x in schema.get('anyOf', [schema]) if x.get('type') != 'null']
+    if len(options) != 1:
+        return 'json'
+    option = options[0]
+    kind = {'string': 'dictionary', 'integer': 'int', 'number': 'float', 'boolean': 'bool'}.get(option.get('type'))
+    if kind is not None:
+        return kind
+    if option.get('type') == 'array':
+        return {'integer': 'int_list', 'string': 'str_list'}.get(option.get('items', {}).get('type'), 'json')
+    return 'json'
+
+_PAGE_COLUMNS = [('file_path', 'dictionary'), ('series_index', 'int'), ('level_index', 'int'), ('page_index', 'int'),
+                 ('frame_count', 'int'), ('tag_count', 'int'), ('compression', 'dictionary')]
+
+# The JSON of the page metadata values that do not fit the type of their column, e.g. the 2-D colormap of palette
+# images, by field name
+_OVERFLOW_COLUMN = ('other_metadata', 'json')
+
+def _page_metadata_columns() -> list:
+    # a column per field of the page metadata, typed from page_schema
+    metadata = load_schema('page_schema')['properties']['metadata']['properties']
+    return [(name, _schema_kind(schema)) for name, schema in metadata.items()]
+
+_TAG_COLUMNS = [('file_path', 'dictionary'), ('series_index', 'int'), ('level_index', 'int'), ('page_index', 'int'),
+                ('name', 'dictionary'), ('dtype', 'dictionary'), ('valueoffset', 'int'), ('count', 'int'),
+                ('value_int', 'int'), ('value_float', 'float'), ('value_text', 'string'), ('value_json', 'string')]
+
+_FILE_COLUMNS = [('file_path', 'dictionary'), ('shape', 'int_list'), ('dtype', 'dictionary'), ('series_count', 'int'),
+                 ('page_count', 'int'), ('elapsed', 'float'), ('error_type', 'dictionary'), ('error_message', 'string')]
+
+def _arrow_type(pa, kind: str):
+    return {
+        'dictionary': lambda: pa.dictionary(pa.int32(), pa.string()),
+        'int': pa.int64,
+        'float': pa.float64,
+        'bool': pa.bool_,
+        'int_list': lambda: pa.list_(pa.int64()),
+        'str_list': lambda: pa.list_(pa.string()),
+        'string': pa.string,
+        'json': pa.string
+    }[kind]()
+
+def _json(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=json_default)
+
+def _int(value) -> Optional[int]:
+    return int(value) if _INT64_RANGE[0] <= value < _INT64_RANGE[1] else None
+
+def _column_value(value, kind: str):
+    # converts a value to what the Arrow type of a column kind takes, or raises ValueError if it does not fit
+    if value is None:
+        return None
+    if kind == 'json':
+        return _json(value)
+    if kind in ('dictionary', 'string'):
+        if isinstance(value, str):
+            return value
+    elif kind == 'bool':
+        if isinstance(value, (bool, numpy.bool_)):
+            return bool(value)
+    elif kind == 'int':
+        if isinstance(value, numbers.Integral) and _int(value) is not None:
+            return int(value)
+    elif kind == 'float':
+        if isinstance(value, numbers.Real):
+            return float(value)
+    elif kind in ('int_list', 'str_list'):
+        if isinstance(value, numpy.ndarray) and value.ndim == 1:
+            value = value.tolist()
+        if isinstance(value, (list, tuple)):
+            return [_column_value(x, 'int' if kind == 'int_list' else 'string') for x in value]
+    raise ValueError(f"Value {value!r:.80} does not fit a {kind} column")
+
+def tag_value_columns(value) -> tuple:
+    """
+    Splits a tag value from a report into the typed value columns of the tag table.
+
+    Args:
+        value: The value field of a row of a page's 'tags'.
+
+    Returns:
+        tuple: (value_int, value_float, value_text, value_json), where only the columns fitting the value are set:
+               integers (and the names of enumerated values such as Compression), floats, text, and the JSON of
+               lists, arrays, summaries and references.
+    """
+    if value is None:
+        return None, None, None, None
+    if isinstance(value, bool):
+        return int(value), None, None, None
+    if isinstance(value, numbers.Integral):
+        as_int = _int(value)
+        name = value.name if isinstance(value, Enum) else None
+        return as_int, None, name, None if as_int is not None else _json(int(value))
+    if isinstance(value, numbers.Real):
+        return None, float(value), None, None
+    if isinstance(value, str):
+        return None, None, value, None
+    return None, None, None, _json(value)
+
+class _Table:
+    """
+    The buffered rows of one table, written as record batches to a part file of the table's directory.
+    """
+    def __init__(self, pa, path: str, columns: list, format: str, batch_rows: int):
+        self.pa = pa
+        self.path = path
+        self.names = [name for name, _ in columns]
+        self.kinds = [kind for _, kind in columns]
+        self.overflow = self.names.index(_OVERFLOW_COLUMN[0]) if _OVERFLOW_COLUMN in columns else None
+        self.schema = pa.schema([(name, _arrow_type(pa, kind)) for name, kind in columns])
+        self.format = format
+        self.batch_rows = batch_rows
+        self.rows = []
+        # the Arrow IPC file format needs one dictionary per column for the whole file, to which batches can only
+        # add values, while Parquet encodes each row group separately
+        self.dictionaries = [{} if kind == 'dictionary' else None for kind in self.kinds]
+        self.sink = None
+        self.writer = None
+
+    def row(self, values: tuple) -> tuple:
+        """
+        Converts the values of a row to the types of the columns.
+
+        Values that do not fit their column are stored as JSON in the overflow column of tables that have one,
+        and raise ValueError otherwise.
+        """
+        row = []
+        misfits = {}
+        for name, kind, value in zip(self.names, self.kinds, values):
+            try:
+                row.append(_column_value(value, kind))
+            except ValueError:
+                if self.overflow is None:
+                    raise
+                row.append(None)
+                misfits[name] = value
+        if misfits:
+            row[self.overflow] = _json(misfits)
+        return tuple(row)
+
+    def extend(self, rows: Iterable[tuple]) -> None:
+        """
+        Adds rows converted with row, writing a batch whenever batch_rows rows are buffered.
+        """
+        for row in rows:
+            self.rows.append(row)
+            if len(self.rows) >= self.batch_rows:
+                self.flush()
+
+    def _array(self, values: list, kind: str, dictionary: Optional[dict]):
+        pa = self.pa
+        if kind == 'dictionary':
+            indices = [None if x is None else dictionary.setdefault(x, len(dictionary)) for x in values]
+            return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(dictionary), pa.string()))
+        return pa.array(values, _arrow_type(pa, kind))
+
+    def _open(self) -> None:
+        pa = self.pa
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self.format == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(self.path, self.schema, compression='zstd')
+        else:
+            self.sink = pa.OSFile(self.path, 'wb')
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        columns = list(zip(*self.rows))
+        arrays = [self._array(list(values), kind, dictionary)
+                  for values, kind, dictionary in zip(columns, self.kinds, self.dictionaries)]
+        self.rows = []
+        if self.format == 'parquet':
+            self.dictionaries = [{} if x is not None else None for x in self.dictionaries]
+        if self.writer is None:
+            self._open()
+        self.writer.write_batch(self.pa.record_batch(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+        self.writer = self.sink = None
+
+def _next_part(directory: str, tables: Iterable[str]) -> int:
+    # parts are numbered across the tables so that the part files written together share a number
+    numbers_used = [-1]
+    for table in tables:
+        table_directory = os.path.join(directory, table)
+        if os.path.isdir(table_directory):
+            for name in os.listdir(table_directory):
+                match = re.match(r'part-(\d+)\.', name)
+                if match:
+                    numbers_used.append(int(match.group(1)))
+    return max(numbers_used)+1
+
+class ColumnarWriter:
+    """
+    Flattens reports into typed columnar tables written as Parquet or Arrow IPC files.
+
+    The output directory holds three tables, each a directory of part files:
+
+        files   one row per file: its path, shape, dtype, series and page counts, and the error of a failed file
+        pages   one row per page (TiffPage) of every level: the series, level and page index, the frame count,
+                the compression and the page metadata, with a column per page_schema field (values that do
+                not fit the type of their field, such as the 2-D colormap of palette images, are stored as JSON
+                in other_metadata)
+        tags    one row per tag of every page: the name, dtype code, value offset, count and the value in
+                value_int, value_float, value_text (text, and the names of enumerated values) or value_json
+
+    Paths, tag names, dtypes and other text metadata are dictionary-encoded. Each writer adds a new part file to
+    every table, so exports of many files or repeated runs append to the same dataset, which reads back as one
+    table, e.g. with pyarrow.dataset.dataset(directory+'/pages'). pyarrow is only imported when a writer is
+    created.
+
+    Example:
+        >>> with ColumnarWriter('reports') as writer:
+        ...     for file_path in file_paths:
+        ...         with TiffInspector(file_path, lazy=True) as inspector:
+        ...             writer.write(inspector.report, file_path)
+    """
+    def __init__(self, directory: str, format: str = 'parquet', batch_rows: int = 65536):
+        """
+        Args:
+            directory (str): The output directory. Existing part files in it are kept.
+            format (str): 'parquet' or 'arrow' (the Arrow IPC file format).
+            batch_rows (int): The number of rows buffered per table before they are written as a batch.
+        """
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported format {format!r}. Use one of {COLUMNAR_FORMATS}.")
+        pa = _pyarrow()
+        self.directory = directory
+        self.format = format
+        metadata_columns = _page_metadata_columns()
+        self._metadata_names = [name for name, _ in metadata_columns]
+        tables = {'files': _FILE_COLUMNS, 'pages': _PAGE_COLUMNS+metadata_columns+[_OVERFLOW_COLUMN],
+                  'tags': _TAG_COLUMNS}
+        part = _next_part(directory, tables)
+        self._tables = dict(
+            (name, _Table(pa, os.path.join(directory, name, f"part-{part:05d}.{format}"), columns,
+                          format, batch_rows))
+            for name, columns in tables.items())
+
+    def write(self, report: dict, file_path: str, elapsed: Optional[float] = None) -> None:
+        """
+        Adds the rows of a report.
+
+        Lazy reports are walked page by page without storing the pages on the report, and reports with compacted
+        'tag_tables' are expanded. The rows of the file are only added once all of them have been converted, so a
+        report that cannot be written leaves no partial rows behind.
+
+        Args:
+            report (dict): The report of the file.
+            file_path (str): The path stored in the file_path column of every row.
+            elapsed (float): The inspection time of the file, if known.
+        """
+        if 'tag_tables' in report:
+            report = expand_report(json.loads(json.dumps(report, default=json_default)))
+        files, pages, tags = self._tables['files'], self._tables['pages'], self._tables['tags']
+        file_row = files.row((file_path, report['shape'], report['dtype'], report['series_count'],
+                              report['page_count'], elapsed, None, None))
+        page_rows, tag_rows = [], []
+        for i, series in enumerate(report['series']):
+            for level in series['levels']:
+                j = level['level_index']
+                for k, page in enumerate(iter_items(level, 'pages')):
+                    compression = None
+                    for name, dtype, valueoffset, count, value in page['tags'] or []:
+                        if name == 'Compression':
+                            compression = value.name if isinstance(value, Enum) else str(value)
+                        tag_rows.append(tags.row((file_path, i, j, k, name, dtype, valueoffset, count,
+                                                  *tag_value_columns(value))))
+                    metadata = page['metadata']
+                    page_rows.append(pages.row((file_path, i, j, k, page['frame_count'], len(page['tags'] or []),
+                                                compression, *[metadata.get(name) for name in self._metadata_names],
+                                                None)))
+        files.extend([file_row])
+        pages.extend(page_rows)
+        tags.extend(tag_rows)
+
+    def write_error(self, file_path: str, error: dict, elapsed: Optional[float] = None) -> None:
+        """
+        Adds the row of a file that could not be inspected to the files table.
+
+        Args:
+            file_path (str): The path of the file.
+            error (dict): The 'type' and 'message' of the error, as in batch records.
+            elapsed (float): The time spent on the file.
+        """
+        files = self._tables['files']
+        files.extend([files.row((file_path, None, None, None, None, elapsed, error['type'], error['message']))])
+
+    def write_records(self, records: Iterable[dict]) -> dict:
+        """
+        Adds batch records (see batch.inspect_files), including the errors of failed files. A report that cannot
+        be written is recorded as a failed file instead of stopping the batch.
+
+        Returns:
+            dict: The number of 'files' written and of 'failures' among them.
+        """
+        counts = {'files': 0, 'failures': 0}
+        for record in records:
+            if 'error' in record:
+                self.write_error(record['file_path'], record['error'], record.get('elapsed'))
+                counts['failures'] += 1
+            else:
+                try:
+                    self.write(record['report'], record['file_path'], record.get('elapsed'))
+                except Exception as e:
+                    self.write_error(record['file_path'], {'type': type(e).__name__, 'message': str(e)},
+                                     record.get('elapsed'))
+                    counts['failures'] += 1
+            counts['files'] += 1
+        return counts
+
+    def close(self) -> None:
+        """
+        Writes the buffered rows and closes the part files.
+        """
+        for table in self._tables.values():
+            table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_columnar(
+    paths: Iterable[str],
+    directory: str,
+    format: str = 'parquet',
+    processes: Optional[int] = None,
+    **kwargs
+) -> dict:
+    """
+    Inspects many files across a process pool and appends their reports to the columnar tables of a directory.
+
+    Args:
+        paths: File paths and/or glob patterns (see batch.expand_paths).
+        directory (str): The output directory (see ColumnarWriter).
+        format (str): 'parquet' or 'arrow'.
+        processes (int): The number of worker processes, as in batch.inspect_files.
+        **kwargs: Passed to TiffInspector for each file.
+
+    Returns:
+        dict: The number of 'files' written and of 'failures' among them.
+    """
+    with ColumnarWriter(directory, format=format) as writer:
+        return writer.write_records(inspect_files(paths, processes=processes, **kwargs))
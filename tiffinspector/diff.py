@@ -0,0 +1,82 @@
+import numpy
+
+from .lazy import LazyDict
+
+# report keys holding lists of child reports, which are matched by position
+_CHILD_LISTS = ('series', 'levels', 'pages')
+
+def _equal(a, b) -> bool:
+    # == of lists or dicts holding NumPy arrays (large_tag_values='array') is ambiguous
+    if a is b:
+        return True
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_equal(a[key], b[key]) for key in a)
+    if isinstance(a, numpy.ndarray) or isinstance(b, numpy.ndarray):
+        return numpy.array_equal(a, b)
+    return a == b
+
+def _diff_tags(old, new, path, diff):
+    old_tags = dict((row[0], row) for row in old)
+    new_tags = dict((row[0], row) for row in new)
+    for name, row in old_tags.items():
+        if name not in new_tags:
+            diff['removed'].append(path+[name])
+        elif not _equal(row, new_tags[name]):
+            diff['changed'].append({'path': path+[name], 'old': row, 'new': new_tags[name]})
+    for name in new_tags:
+        if name not in old_tags:
+            diff['added'].append(path+[name])
+
+def _diff_list(old, new, path, diff):
+    if old is new:
+        return
+    for k, (a, b) in enumerate(zip(old, new)):
+        if a is not b:
+            _diff_node(a, b, path+[k], diff)
+    diff['removed'].extend(path+[k] for k in range(len(new), len(old)))
+    diff['added'].extend(path+[k] for k in range(len(old), len(new)))
+
+def _diff_node(old, new, path, diff):
+    if old is new:
+        return
+    for key in old:
+        if isinstance(old, LazyDict) and not old.is_loaded(key):
+            # never read from the previous file, so there is nothing to compare with
+            continue
+        if key not in new:
+            diff['removed'].append(path+[key])
+            continue
+        a, b = old[key], new[key]
+        if a is b:
+            continue
+        if key in _CHILD_LISTS and isinstance(a, list) and isinstance(b, list):
+            _diff_list(a, b, path+[key], diff)
+        elif key == 'tags' and a is not None and b is not None:
+            _diff_tags(a, b, path+[key], diff)
+        elif not _equal(a, b):
+            diff['changed'].append({'path': path+[key], 'old': a, 'new': b})
+    diff['added'].extend(path+[key] for key in new if key not in old)
+
+def diff_reports(old: dict, new: dict) -> dict:
+    """
+    Returns the structural differences between two reports of a file, e.g. before and after TiffInspector.refresh.
+
+    Series, levels and pages are matched by position and tags by name. Subtrees that both reports share, such as
+    the page reports a refresh keeps, are skipped without being compared, and the parts of a lazy old report that
+    were never loaded are not compared. Reports with compacted 'tag_tables' should be expanded first.
+
+    Args:
+        old (dict): The earlier report.
+        new (dict): The later report.
+
+    Returns:
+        dict: {'added': [path], 'removed': [path], 'changed': [{'path', 'old', 'new'}]}, where a path is the list
+              of keys and indices from the report root, e.g. ['series', 0, 'levels', 0, 'pages', 12] for an added
+              page or ['series', 0, 'levels', 0, 'pages', 0, 'tags', 'ImageDescription'] for a changed tag, whose
+              'old' and 'new' are the tag rows.
+    """
+    diff = {'added': [], 'removed': [], 'changed': []}
+    _diff_node(old, new, [], diff)
+    return diff
@@ -0,0 +1,96 @@
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import List, Union
+
+def append_frame(runs: List[dict], frame_metadata: dict) -> None:
+    """
+    Adds a TiffFrame to a run-length encoded list of frames.
+
+    A frame extends the last run when all of its metadata other than the index matches the run and its index
+    continues the run's stride. Otherwise a new run is started.
+
+    Args:
+        runs: The list of runs stored on a page report. Each run is a dict with 'start', 'count', 'stride'
+              and the 'metadata' shared by all frames of the run.
+        frame_metadata: The metadata of the frame as extracted with the frame schema.
+    """
+    index = frame_metadata['index']
+    shared = dict((k, v) for k, v in frame_metadata.items() if k != 'index')
+    if runs and isinstance(index, int) and runs[-1]['metadata'] == shared:
+        run = runs[-1]
+        step = index - (run['start'] + (run['count'] - 1) * run['stride'])
+        if run['count'] == 1 and step > 0:
+            run['stride'] = step
+        if step > 0 and step == run['stride']:
+            run['count'] += 1
+            return
+    runs.append({
+        'start': index,
+        'count': 1,
+        'stride': 1,
+        'metadata': shared
+    })
+
+def run_last_index(run: dict) -> int:
+    """
+    Returns the index of the last frame in a run.
+    """
+    return run['start'] + (run['count'] - 1) * run['stride']
+
+def run_index_text(run: dict) -> str:
+    """
+    Formats the frame indices of a run, e.g. '7' for a single frame, '2-49' or '2-98 stride:2'.
+    """
+    if run['count'] == 1:
+        return f"{run['start']}"
+    text = f"{run['start']}-{run_last_index(run)}"
+    if run['stride'] != 1:
+        text += f" stride:{run['stride']}"
+    return text
+
+class FrameRuns(Sequence):
+    """
+    A read-only sequence of per-frame dicts backed by the run-length encoded frames of a page report.
+
+    Each item has the same form the frames had before they were compressed, i.e. {'metadata': {'index': ...,
+    'shape': ..., 'axes': ...}}, but the items are built when they are accessed.
+
+    Example:
+        >>> frames = FrameRuns(page_report['frames'])
+        >>> len(frames) == page_report['frame_count']
+        True
+    """
+    def __init__(self, runs: List[dict]):
+        self.runs = runs
+        self._starts = []
+        total = 0
+        for run in runs:
+            self._starts.append(total)
+            total += run['count']
+        self._len = total
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _frame(self, run: dict, offset: int) -> dict:
+        metadata = {'index': run['start'] + offset * run['stride']}
+        metadata.update(run['metadata'])
+        return {'metadata': metadata}
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('frame index out of range')
+        r = bisect_right(self._starts, i) - 1
+        return self._frame(self.runs[r], i - self._starts[r])
+
+    def __iter__(self):
+        for run in self.runs:
+            for offset in range(run['count']):
+                yield self._frame(run, offset)
+
+    def __repr__(self) -> str:
+        return f"FrameRuns({len(self.runs)} runs, {self._len} frames)"
@@ -0,0 +1,139 @@
+import threading, time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Iterable, Optional
+
+# A hook is called as hook(kind, name, value) with kind 'span' (value in seconds) or 'counter' (the increment)
+Hook = Callable[[str, str, float], None]
+
+class Instrumentation:
+    """
+    Timing spans and counters of the work done by TiffInspector.
+
+    Spans are inclusive: the 'level' span of an eagerly built level contains its 'page_walk', which contains the
+    'tag_conversion' of its pages. Spans and counters are aggregated per name, and every measurement is also
+    passed to the registered hooks, e.g. to forward it to a metrics client. One Instrumentation can be shared by
+    many inspectors (and threads) to aggregate over a whole service.
+
+    Example:
+        >>> instrumentation = Instrumentation()
+        >>> inspector = TiffInspector('slide.svs', instrumentation=instrumentation)
+        >>> print(instrumentation.summary_table())
+    """
+    enabled = True
+
+    def __init__(self, hooks: Optional[Iterable[Hook]] = None):
+        """
+        Args:
+            hooks (list): Callables called as hook(kind, name, value) for every span and counter update.
+        """
+        self.hooks = list(hooks or [])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+        Registers a callable called as hook(kind, name, value) for every span and counter update.
+        """
+        self.hooks.append(hook)
+
+    def reset(self) -> None:
+        """
+        Clears the aggregated spans and counters.
+        """
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Adds a measured duration to the span of a name.
+        """
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+        for hook in self.hooks:
+            hook('span', name, seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Times the enclosed block as one call of the span of a name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter()-start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        Increments the counter of a name.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0)+n
+        for hook in self.hooks:
+            hook('counter', name, n)
+
+    def summary(self) -> dict:
+        """
+        Returns the aggregated measurements.
+
+        Returns:
+            dict: {'spans': {name: {'calls', 'total_s', 'mean_s', 'max_s'}}, 'counters': {name: value}}
+        """
+        with self._lock:
+            spans = dict((name, {'calls': calls, 'total_s': total, 'mean_s': total/calls, 'max_s': longest})
+                         for name, (calls, total, longest) in self.spans.items())
+            return {'spans': spans, 'counters': dict(self.counters)}
+
+    def summary_table(self) -> str:
+        """
+        Returns the aggregated measurements as a text table, spans by decreasing total time, then counters.
+        """
+        summary = self.summary()
+        lines = [f"{'span':<24}{'calls':>10}{'total ms':>12}{'mean ms':>12}{'max ms':>12}"]
+        for name, stats in sorted(summary['spans'].items(), key=lambda x: -x[1]['total_s']):
+            lines.append(f"{name:<24}{stats['calls']:>10}{1e3*stats['total_s']:>12.3f}"
+                         f"{1e3*stats['mean_s']:>12.3f}{1e3*stats['max_s']:>12.3f}")
+        if summary['counters']:
+            lines.append(f"{'counter':<24}{'value':>10}")
+            for name, value in sorted(summary['counters'].items()):
+                lines.append(f"{name:<24}{value:>10}")
+        return "\n".join(lines)
+
+class NullInstrumentation:
+    """
+    The instrumentation of inspectors created without one: every span and counter is a no-op.
+    """
+    enabled = False
+    _null_span = nullcontext()
+
+    def span(self, name: str):
+        return self._null_span
+
+    def record(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+def timed(name: str):
+    """
+    Decorates a TiffInspector method so that each call is timed as a span of its instrumentation.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
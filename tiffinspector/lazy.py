@@ -0,0 +1,168 @@
+from itertools import islice
+from typing import Any, Callable, Iterator, Optional
+
+_PENDING = object()
+
+class Deferred:
+    """
+    A value that is computed by a loader the first time it is requested.
+
+    Deferred cells are shared between copies of a LazyDict so that a subtree is only ever built once,
+    no matter how many reports reference it.
+    """
+    __slots__ = ('_loader', '_value', '_stream')
+
+    def __init__(self, loader: Callable[[], Any], stream: Optional[Callable[[], Iterator]] = None):
+        """
+        Args:
+            loader: A callable building the value.
+            stream: For list values, an optional callable yielding the items one at a time without keeping them,
+                    used to walk a subtree that has not been built with bounded memory. It is called with the
+                    start and stop (or None) of the items to yield.
+        """
+        self._loader = loader
+        self._value = _PENDING
+        self._stream = stream
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _PENDING
+
+    @property
+    def value(self) -> Any:
+        if self._value is _PENDING:
+            self._value = self._loader()
+            self._loader = None
+            self._stream = None
+        return self._value
+
+    def stream(self, start: int = 0, stop: Optional[int] = None) -> Iterator:
+        """
+        Iterates the items of the value from start to stop, without building and keeping the value if it is still
+        pending.
+        """
+        if self._value is _PENDING and self._stream is not None:
+            return self._stream(start, stop)
+        return islice(self.value, start, stop)
+
+class LazyDict(dict):
+    """
+    A dict where some of the values are only built when they are accessed.
+
+    Pending keys are present in the dict (so iteration order, ``len`` and ``in`` behave like the eager report),
+    but their values are produced by a Deferred on first access through ``[]``, ``get``, ``items`` or ``values``.
+    Serializing with ``json.dumps`` goes through ``items`` and therefore materializes the whole subtree.
+    """
+    def __init__(self, *args, deferred: Optional[dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._deferred = {}
+        for key, loader in (deferred or {}).items():
+            self.defer(key, loader)
+
+    def defer(self, key: Any, loader: Callable[[], Any], stream: Optional[Callable[[], Iterator]] = None) -> None:
+        """
+        Register a loader for a key whose value will be built on first access.
+
+        Args:
+            key: The key in the dict.
+            loader: A callable (or an existing Deferred) producing the value.
+            stream: For list values, an optional callable yielding the items without keeping them (see stream).
+        """
+        self._deferred[key] = loader if isinstance(loader, Deferred) else Deferred(loader, stream)
+        dict.__setitem__(self, key, _PENDING)
+
+    def stream(self, key: Any, start: int = 0, stop: Optional[int] = None) -> Iterator:
+        """
+        Iterates the items of a list value from start to stop. If the value is still pending and was deferred
+        with a stream, the items are produced one at a time and the value is not stored.
+        """
+        if key in self._deferred:
+            return self._deferred[key].stream(start, stop)
+        return islice(self[key], start, stop)
+
+    def is_loaded(self, key: Any) -> bool:
+        """
+        Returns True if the value for a key has already been built.
+        """
+        return key not in self._deferred or self._deferred[key].loaded
+
+    def _resolve(self, key: Any, value: Any) -> Any:
+        if value is _PENDING:
+            value = self._deferred.pop(key).value
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._deferred.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._deferred.pop(key, None)
+        dict.__delitem__(self, key)
+
+    def __iter__(self):
+        # overriding __iter__ keeps dict(), {**d} and dict.update() off the C fast path that would copy
+        # the pending placeholders instead of going through __getitem__
+        return dict.__iter__(self)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def pop(self, key: Any, *args) -> Any:
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *args)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def copy(self) -> 'LazyDict':
+        """
+        Returns a shallow copy that shares any pending Deferred values with this dict.
+        """
+        new = LazyDict()
+        for key in self:
+            value = dict.__getitem__(self, key)
+            if value is _PENDING:
+                new.defer(key, self._deferred[key])
+            else:
+                dict.__setitem__(new, key, value)
+        return new
+
+    def __eq__(self, other: Any) -> bool:
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(dict((key, '<pending>' if not self.is_loaded(key) else self[key]) for key in self))
+
+    def __reduce__(self):
+        # pickling and deepcopy produce a fully built plain dict
+        return (dict, (self.items(),))
+
+def iter_items(node: dict, key: str, start: int = 0, stop: Optional[int] = None) -> Iterator:
+    """
+    Iterates the list stored under a key of a report node, from start to stop.
+
+    Lazy subtrees that have not been built are walked without being stored on the report (see LazyDict.stream),
+    and a stream that supports it skips the items before start without building them.
+    """
+    return node.stream(key, start, stop) if isinstance(node, LazyDict) else islice(node[key], start, stop)
@@ -0,0 +1,194 @@
+import threading
+from functools import partial
+from itertools import groupby
+from typing import Optional
+
+import numpy
+
+PIXEL_STATS_MODES = ('sample', 'smallest')
+
+# Defaults of the pixel statistics: chunks sampled per level, stored bytes read per file and histogram bins
+DEFAULT_SAMPLE_CHUNKS = 16
+DEFAULT_MAX_PIXEL_BYTES = 64*1024**2
+DEFAULT_HISTOGRAM_BINS = 64
+
+# The number of values of each chunk kept for the histogram
+_HISTOGRAM_VALUES = 65536
+
+class PixelBudget:
+    """
+    The stored bytes that the pixel statistics of one file may still read, shared out between its levels.
+
+    Each level gets an equal share of what is left when its statistics are computed, so bytes a small level does
+    not use remain available to the levels after it.
+    """
+    def __init__(self, max_bytes: int, level_count: int):
+        """
+        Args:
+            max_bytes (int): The stored bytes that may be read from the file in total.
+            level_count (int): The number of levels the budget is shared between.
+        """
+        self.remaining = max_bytes
+        self.levels_left = level_count
+        self._lock = threading.Lock()
+
+    def take(self) -> int:
+        """
+        Returns the share of the next level, which must later return what it did not read with spend.
+        """
+        with self._lock:
+            share = self.remaining//max(1, self.levels_left)
+            self.remaining -= share
+            self.levels_left -= 1
+            return share
+
+    def spend(self, share: int, used: int) -> None:
+        """
+        Returns the part of a level's share that it did not read.
+        """
+        with self._lock:
+            self.remaining += share-used
+
+def smallest_level(series):
+    """
+    Returns the level of a tifffile TiffPageSeries with the fewest pixels.
+    """
+    return min(series.levels, key=lambda level: int(numpy.prod(level.shape)))
+
+def _sample_indices(total: int, sample_chunks: Optional[int]) -> numpy.ndarray:
+    # evenly spaced chunks, so that the sample covers the whole level rather than one corner
+    if sample_chunks is None or sample_chunks >= total:
+        return numpy.arange(total)
+    return numpy.unique(numpy.linspace(0, total-1, max(1, sample_chunks)).round().astype(numpy.int64))
+
+def _chunk_summary(segment, shaped: tuple, blank_tolerance: float) -> Optional[tuple]:
+    # reduces one decoded chunk, cropped to the image, to its min, max, sums, blank flag and histogram values
+    data, position, _ = segment
+    if data is None:
+        return None
+    _, depth, length, width, _ = shaped
+    data = data[:depth-position[1], :length-position[2], :width-position[3]]
+    if not data.size:
+        return None
+    if data.dtype.kind == 'b':
+        data = data.view(numpy.uint8)
+    elif data.dtype.kind == 'c':
+        data = numpy.abs(data)
+    values = data.reshape(-1)
+    if values.dtype.kind == 'f':
+        values = values[numpy.isfinite(values)]
+        if not values.size:
+            return None
+    low, high = values.min(), values.max()
+    as_float = values.astype(numpy.float64)
+    step = max(1, values.size//_HISTOGRAM_VALUES)
+    return (low, high, float(as_float.sum()), float(numpy.dot(as_float, as_float)), values.size,
+            bool(high-low <= blank_tolerance), values[::step].copy())
+
+def level_pixel_stats(
+    level,
+    sample_chunks: Optional[int] = DEFAULT_SAMPLE_CHUNKS,
+    max_bytes: int = DEFAULT_MAX_PIXEL_BYTES,
+    bins: int = DEFAULT_HISTOGRAM_BINS,
+    blank_tolerance: float = 0,
+    max_workers: int = 4
+) -> dict:
+    """
+    Computes pixel statistics of a pyramid level from a sample of its tiles or strips.
+
+    The chunks are chosen evenly spaced over all pages and frames of the level, read in file order and decoded
+    with tifffile's chunk decoder in a thread pool. Chunks are only read while their stored bytes fit into
+    max_bytes, so the statistics may cover fewer chunks than requested. Edge chunks are cropped to the image.
+
+    Args:
+        level: The tifffile TiffPageSeries of the level.
+        sample_chunks (int): The number of chunks to sample. None reads every chunk.
+        max_bytes (int): The stored bytes that may be read.
+        bins (int): The number of histogram bins between the sampled min and max.
+        blank_tolerance (float): Chunks whose max and min differ by no more than this are counted as blank.
+        max_workers (int): The number of decoding threads.
+
+    Returns:
+        dict: 'chunks_total', 'chunks_sampled' and 'chunks_read' (sampled chunks dropped for the byte budget are
+              not read), 'bytes_read', 'complete' (every chunk was read), the 'min', 'max', 'mean' and 'std' of
+              the values of all samples, a 'histogram' of 'edges' and 'counts' (of up to 65536 values per chunk),
+              and the 'blank_chunks' count, 'blank_fraction' and 'blank_chunk_indices' (indices into the chunks
+              of all pages of the level, in page order) of the chunks read.
+    """
+    pages = [page for page in level.pages if page is not None]
+    keyframe = level.keyframe
+    counts = numpy.array([len(page.dataoffsets) for page in pages], numpy.int64)
+    starts = numpy.concatenate([[0], numpy.cumsum(counts)])
+    total = int(starts[-1])
+    sampled = _sample_indices(total, sample_chunks)
+
+    # sampled chunks in order while they fit into the budget
+    chosen = []
+    bytes_read = 0
+    for index in sampled.tolist():
+        p = int(numpy.searchsorted(starts, index, side='right'))-1
+        chunk = index-int(starts[p])
+        bytecount = int(pages[p].databytecounts[chunk])
+        if bytes_read+bytecount > max_bytes:
+            break
+        bytes_read += bytecount
+        chosen.append((p, chunk, index))
+
+    decodeargs = {'_fullsize': bool(keyframe.is_tiled)}
+    if keyframe.compression in (6, 7, 34892, 33007):  # JPEG
+        decodeargs['jpegtables'] = keyframe.jpegtables
+        decodeargs['jpegheader'] = keyframe.jpegheader
+    def summarize(segment, chunks):
+        # read_segments yields the position of each segment in the offsets it was given, which may be reordered
+        data, position = segment
+        chunk, index = chunks[position]
+        decoded = keyframe.decode(data, chunk, **decodeargs)
+        return index, _chunk_summary(decoded, keyframe.shaped, blank_tolerance)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # the file is read in the calling thread, as in TiffPage.segments, and the chunks are decoded in the pool
+    fh = keyframe.parent.filehandle
+    summaries = []
+    with ThreadPoolExecutor(max(1, max_workers)) as executor:
+        for p, group in groupby(chosen, key=lambda x: x[0]):
+            page = pages[p]
+            chunks = [(chunk, index) for _, chunk, index in group]
+            segments = fh.read_segments([page.dataoffsets[chunk] for chunk, _ in chunks],
+                                        [page.databytecounts[chunk] for chunk, _ in chunks],
+                                        lock=fh.lock, sort=True)
+            summaries.extend(executor.map(partial(summarize, chunks=chunks), segments))
+    summaries = sorted((index, summary) for index, summary in summaries if summary is not None)
+
+    stats = {
+        'chunks_total': total,
+        'chunks_sampled': int(sampled.size),
+        'chunks_read': len(chosen),
+        'bytes_read': bytes_read,
+        'complete': len(chosen) == total
+    }
+    if not summaries:
+        stats.update({'min': None, 'max': None, 'mean': None, 'std': None, 'histogram': None,
+                      'blank_chunks': 0, 'blank_fraction': None, 'blank_chunk_indices': []})
+        return stats
+    low = min(summary[0] for _, summary in summaries)
+    high = max(summary[1] for _, summary in summaries)
+    count = sum(summary[4] for _, summary in summaries)
+    mean = sum(summary[2] for _, summary in summaries)/count
+    variance = sum(summary[3] for _, summary in summaries)/count-mean*mean
+    values = numpy.concatenate([summary[6] for _, summary in summaries])
+    # integer bins end after the max so that it falls into the last bin like every other value
+    histogram_range = (float(low), float(high)+1) if values.dtype.kind in 'iu' else (float(low), float(high))
+    histogram_counts, edges = numpy.histogram(values, bins, histogram_range)
+    blank = [index for index, summary in summaries if summary[5]]
+    stats.update({
+        'min': low.item(),
+        'max': high.item(),
+        'mean': mean,
+        'std': max(0.0, variance)**0.5,
+        'histogram': {'edges': edges.tolist(), 'counts': histogram_counts.tolist()},
+        'blank_chunks': len(blank),
+        'blank_fraction': len(blank)/len(summaries),
+        'blank_chunk_indices': blank
+    })
+    return stats
@@ -0,0 +1,110 @@
+import copy, os
+
+from tifffile import TiffPage, TiffTags
+
+from .lazy import LazyDict
+from .summary import _OTHER_SERIES_FORMATS
+
+# Series formats for which tifffile reads pages after the first as TiffFrames, or reads them differently from
+# generic series
+_SERIES_FORMATS = ('shaped', 'ome', 'uniform')+_OTHER_SERIES_FORMATS
+
+def file_state(file_path: str) -> tuple:
+    """
+    Returns the (size, mtime_ns) of a file, which changes when pages are appended to it.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def _offset(page) -> int:
+    return page if isinstance(page, int) else page.offset
+
+def _parsed_pages(tiff) -> dict:
+    # the TiffPages of a TiffFile's series by IFD offset, if its series have been built
+    if 'series' not in vars(tiff):
+        return {}
+    return dict((page.offset, page) for series in tiff.series for level in series.levels for page in level.pages
+                if isinstance(page, TiffPage))
+
+def _reparent(page, tiff):
+    # a copy of a TiffPage that reads its image data and delay-loaded tag values through another TiffFile
+    page = copy.copy(page)
+    page.parent = tiff
+    tags = TiffTags()
+    for tag in page.tags.values():
+        tag = copy.copy(tag)
+        tag.parent = tiff
+        tags.add(tag)
+    page.tags = tags
+    return page
+
+def seed_ifd_chain(tiff, previous_tiff) -> int:
+    """
+    Copies the IFDs of the main chain already found in a previous TiffFile of the same file into a newly opened
+    one, so that following the chain in the new file starts at the last known IFD instead of the first.
+
+    tifffile keeps the offsets of the IFDs it has not read yet as ints in TiffPages.pages and continues the scan
+    of the chain from the last entry of that list, re-reading its next-IFD offset, which the writer updates when
+    it appends a page. When the grown file is read as generic series, whose pages are all TiffPages, the
+    TiffPages already parsed for the previous file's series are copied in as well, so that building the new
+    series only parses the IFDs that were appended. Pages of other series formats, which tifffile reads as
+    TiffFrames, are parsed again. Nothing is copied when the first IFD moved.
+
+    Args:
+        tiff: The newly opened tifffile TiffFile, of which no page beyond the first has been read.
+        previous_tiff: The TiffFile opened on the file before it grew.
+
+    Returns:
+        int: The number of offsets copied.
+    """
+    pages = getattr(tiff.pages, 'pages', None)
+    previous_pages = getattr(previous_tiff.pages, 'pages', None)
+    if not isinstance(pages, list) or not isinstance(previous_pages, list) or len(pages) != 1 or not previous_pages:
+        return 0
+    if _offset(pages[0]) != _offset(previous_pages[0]):
+        return 0
+    pages.extend(_offset(page) for page in previous_pages[1:])
+    # the series format follows from the file flags, which read the first, second, eighth and last IFD
+    if not any(getattr(tiff, f'is_{kind}', False) for kind in _SERIES_FORMATS):
+        parsed = _parsed_pages(previous_tiff)
+        for k in range(1, len(previous_pages)):
+            page = parsed.get(pages[k])
+            if page is not None:
+                pages[k] = _reparent(page, tiff)
+    return len(previous_pages)-1
+
+def _loaded(node, key) -> bool:
+    return not isinstance(node, LazyDict) or node.is_loaded(key)
+
+def resume_points(report: dict, tiff) -> dict:
+    """
+    Collects, for each level whose pages are in a report, the page reports that a refresh can keep and the
+    position in the level's page list at which walking resumes.
+
+    Every page report but the last of a level is kept: the last one is walked again since frames appended to the
+    file may extend it. Levels are identified by the offset of their first IFD, which does not change when pages
+    are appended, and the offset of the page at the resume position is recorded to check that it is still the
+    same page in the grown file.
+
+    Args:
+        report (dict): The report built from tiff.
+        tiff: The open TiffFile the report was built from.
+
+    Returns:
+        dict: {first IFD offset: (kept page reports, resume position, IFD offset at the resume position)}
+    """
+    points = {}
+    if not _loaded(report, 'series'):
+        return points
+    for series_report, series in zip(report['series'], tiff.series):
+        if not _loaded(series_report, 'levels'):
+            continue
+        for level_report, level in zip(series_report['levels'], series.levels):
+            if not _loaded(level_report, 'pages') or not level_report['pages'] or not level.pages or level.pages[0] is None:
+                continue
+            kept = level_report['pages'][:-1]
+            start = sum(1+page_report['frame_count'] for page_report in kept)
+            if start >= len(level.pages) or level.pages[start] is None:
+                continue
+            points[level.pages[0].offset] = (kept, start, level.pages[start].offset)
+    return points
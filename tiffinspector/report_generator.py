@@ -1,24 +1,132 @@
 import json, html, re
+from functools import lru_cache
 
-import xmltodict
-
-from IPython.display import JSON, HTML, Markdown
-from .utils import is_xml, truncate_tree, truncate_text_html
-
-def header_html(metadata,lineweight=2,width=25):
-    # Create an empty HTML string
-    html_str = ""
+from .utils import description_digest, parse_description, truncate_tree, truncate_text_html
+from .frames import run_index_text
+from .lazy import iter_items
 
+def _iter_header_html(metadata,lineweight=2,width=25):
     for _property in metadata:
         # Add the the property to the HTML string
-        html_str += f"<b>{_property}:</b> {metadata[_property]}<br>"
-                
+        yield f"<b>{_property}:</b> {metadata[_property]}<br>"
     # Add a horizontal line to separate the overall metadata from the page data
-    if lineweight: 
-        html_str += f'<hr style="border: {lineweight}px solid black; width: {width}%; padding-left: 10px; margin-left: 0;" />'
-    return html_str
+    if lineweight:
+        yield f'<hr style="border: {lineweight}px solid black; width: {width}%; padding-left: 10px; margin-left: 0;" />'
+
+def header_html(metadata,lineweight=2,width=25):
+    return "".join(_iter_header_html(metadata,lineweight,width))
  
-def display_report(self,expanded=False,levels=None,max_text_length=None):
+def get_description(self, description):
+    """
+    Returns the parsed form of an image description, parsed once per distinct description.
+
+    Parsed descriptions are kept on the inspector (shared with its views) rather than on the report, keyed by
+    the digest of their content, as {'format': 'xml' or 'text', 'tree': dict or None}.
+    """
+    digest = description_digest(description)
+    descriptions = self._descriptions
+    if digest not in descriptions:
+        with self.instrumentation.span('description_parsing'):
+            descriptions[digest] = parse_description(description, digest)
+    return descriptions[digest]
+
+def _description_html(self, page, expanded, levels, max_text_length):
+    _tags_dict = dict([(x[0],x[4]) for x in page['tags'] or []])
+    if 'ImageDescription' not in _tags_dict or _tags_dict['ImageDescription'] is None:
+        return f"<b>description:</b> {None}<br>"
+    _description = get_description(self, _tags_dict['ImageDescription'])
+    if _description['format'] == 'xml':
+        _tree = json.dumps(truncate_tree(_description['tree'],levels,max_text_length), indent=1)
+        return (f"<details{' open' if expanded else ''}><summary><b>description:</b> (XML format)</summary>"
+                f"<pre>{html.escape(_tree)}</pre></details>")
+    return (f"<b>description:</b> (Plain text format)<br>"
+            f"{truncate_text_html(html.escape(_tags_dict['ImageDescription']),max_text_length)}<br>")
+
+def render_report_html(self,pages=None,expanded=False,levels=None,max_text_length=None,collapsed=True,max_bytes=2*1024**2):
+    """
+    Renders the report, or a window of its pages, as a single HTML document of bounded size.
+
+    Args:
+        pages (slice or int): The pages of each level to render, e.g. slice(100, 200). None renders all pages.
+        expanded (bool): If True, XML descriptions are shown expanded.
+        levels (int): The number of tree levels of XML descriptions to show (see truncate_tree).
+        max_text_length (int): The maximum length of text values.
+        collapsed (bool): If True, each series, level and page is a collapsed <details> section.
+        max_bytes (int): Pages after the document reaches this size (in characters) are left out, including those
+                         of the later levels and series, and a note names the series, level and window to render
+                         next. The tag rows and description of a page that would exceed it are left out as well.
+                         None disables the limit.
+
+    Returns:
+        str: The HTML document.
+    """
+    if pages is None:
+        pages = slice(None)
+    elif isinstance(pages, int):
+        pages = slice(pages, pages+1)
+    if pages.start is not None and pages.start < 0 or pages.stop is not None and pages.stop < 0 or pages.step not in (None, 1):
+        raise ValueError("pages must be a non-negative slice with step 1, or an int")
+    start = pages.start or 0
+    _open = '' if collapsed else ' open'
+    parts = [header_html(self.report['metadata'],lineweight=4,width=75)]
+    size = len(parts[0])
+    truncated = None
+    for i, series in enumerate(iter_items(self.report, 'series')):
+        parts.append(f"<details{_open}><summary><b>Series {i+1} of {self.report['series_count']}</b></summary>")
+        parts.append(header_html(series['metadata'],lineweight=2,width=50))
+        for j, level in enumerate(iter_items(series, 'levels')):
+            parts.append(f"<details{_open} style='margin-left: 20px;'><summary><b>Level {level['level_index']+1} of {series['level_count']}</b></summary>")
+            parts.append(header_html(level['metadata'],lineweight=1,width=25))
+            # only the pages of the window are walked, lazy levels skip the pages before it without reading them
+            for k, page in enumerate(iter_items(level, 'pages', start, pages.stop), start):
+                if max_bytes is not None and size > max_bytes:
+                    truncated = (i, j, k) if truncated is None else truncated
+                    break
+                page_parts = [
+                    f"<details{_open} style='margin-left: 20px;'><summary><b>Page {k+1} of {level['tiffpage_count']}</b></summary>",
+                    header_html(page['metadata'],lineweight=0),
+                    header_html({},lineweight=1),
+                    f"<b>Frames: {page['frame_count']}</b><br>{html.escape(str([run_index_text(x) for x in page['frames']]))}",
+                    "</details>"
+                ]
+                # the description and the tag table of a single page may be larger than the limit, so they are
+                # cut to what is left of it
+                budget = None if max_bytes is None else max_bytes-size-sum(len(x) for x in page_parts)
+                description = _description_html(self, page, expanded, levels, max_text_length)
+                if budget is not None and len(description) > budget:
+                    description = f"<b>description:</b> ({len(description)} characters, left out to stay within max_bytes)<br>"
+                page_parts[2:2] = [description, _page_html(page,max_text_length,max_bytes=None if budget is None else budget-len(description))]
+                size += sum(len(x) for x in page_parts)
+                parts.extend(page_parts)
+            parts.append("</details>")
+        parts.append("</details>")
+    if truncated is not None:
+        i, j, k = truncated
+        stop = '...' if pages.stop is None else pages.stop
+        # the window applies to every level but the limit to the whole document, so the note names the level to
+        # continue with rather than just the next window
+        parts.append(f'<p style="color: blue;">Output limited to {max_bytes} characters: stopped at page {k} of level '
+                     f'{j} in series {i}, and the pages of the levels and series after it were left out. Continue '
+                     f'with .series({i}).levels({j}).render_report_html(pages=slice({k}, {stop})), then the levels '
+                     f'and series after it.</p>')
+    return "".join(parts)
+
+def display_report(self,expanded=False,levels=None,max_text_length=None,pages=None,windowed=False,collapsed=True,max_bytes=2*1024**2):
+        """
+        Displays the report in a notebook.
+
+        By default every series, level, page, tag table and frame list is displayed as its own output. With
+        windowed=True (or when pages is given) the report is rendered with render_report_html as a single HTML
+        output of at most max_bytes, showing only the selected pages of each level, with collapsible sections.
+        """
+        # notebook rendering dependencies are only imported when a report is displayed
+        from IPython.display import display, JSON, HTML, Markdown
+
+        if windowed or pages is not None:
+            display(HTML(render_report_html(self,pages=pages,expanded=expanded,levels=levels,max_text_length=max_text_length,
+                                            collapsed=collapsed,max_bytes=max_bytes)))
+            return
+
         display(HTML(header_html(self.report['metadata'],lineweight=4,width=75)))
         for i, series in enumerate(self.report['series']):
             display(Markdown(f"## Series {i+1} of {self.report['series_count']}"))
@@ -34,10 +142,10 @@ def display_report(self,expanded=False,levels=None,max_text_length=None):
 
                     _tags_dict = dict([(x[0],x[4]) for x in page['tags']])
                     if 'ImageDescription' in _tags_dict and _tags_dict['ImageDescription'] is not None:
-                        if is_xml(_tags_dict['ImageDescription']):
+                        _description = get_description(self, _tags_dict['ImageDescription'])
+                        if _description['format'] == 'xml':
                             display(Markdown(f"**description:** (XML format)"))
-                            _d = json.loads(json.dumps(xmltodict.parse(_tags_dict['ImageDescription'])))
-                            display(JSON(json.loads(json.dumps(truncate_tree(_d,levels,max_text_length))),expanded=expanded))
+                            display(JSON(truncate_tree(_description['tree'],levels,max_text_length),expanded=expanded))
                         else:
                             display(Markdown(f"**description:** (Plain text format)"))
                             display(HTML(truncate_text_html(html.escape(_tags_dict['ImageDescription']),max_text_length)))
@@ -47,75 +155,125 @@ def display_report(self,expanded=False,levels=None,max_text_length=None):
                     display(HTML(_page_html(page,max_text_length)))
                     display(HTML(header_html({},lineweight=1)))
                     display(Markdown(f"#### Frames: {page['frame_count']}"))
-                    display(Markdown(f"{list([x['metadata']['index'] for x in page['frames']])}"))
-
-def _page_html(page,max_text_length=None,indent_str="&nbsp;&nbsp;&nbsp;"):
-        # Add an indention for the tags table
-        html_str = ""+indent_str
-        # Create the table for the tags
-        html_str += "<table>"
-        # Iterate through the tags in the page
-        html_str += "<tr><th><b>name</b></th>"
-        html_str += "<th><b>dtype</b></th>"
-        html_str += "<th><b>valueoffset</b></th>"
-        html_str += "<th><b>count</b></th>"
-        html_str += "<th style='text-align:left;'>value</b></th></tr>"
-        for i, tag in enumerate(page['tags']):
-            # Add the tag name and value to the HTML string
-            html_str += f"<tr><td>{tag[0]}</td>"
-            html_str += f"<td>{tag[1]}</td>"
-            html_str += f"<td>{tag[2]}</td>"
-            html_str += f"<td>{tag[3]}</td>"
-            html_str += f"<td style='text-align:left;'>{truncate_text_html(html.escape(str(tag[4])),max_text_length)}</td></tr>"
-        # Close the table for the tags
-        html_str += "</table>"
-        return html_str
+                    display(Markdown(f"{list([run_index_text(x) for x in page['frames']])}"))
 
-def get_layout_text(self):
-    text = ''
-    for i, series in enumerate(self.report["series"]):
-        series_name = series["metadata"].get("name", "Unnamed Series")
-        text += f"Series index:{series['metadata']['index']} name:({series_name}) shape:{series['metadata']['shape']} axes:{series['metadata']['axes']}\n"
-        for j, level in enumerate(series["levels"]):
-            level_name = level['metadata'].get("name", "Unnamed Level")
-            text += f"    Level index:{level['level_index']} name:({level_name}) shape:{level['metadata']['shape']} axes:{level['metadata']['axes']}\n"
-            for k, page in enumerate(level["pages"]):
-                text += f"        Page index:{page['metadata']['index']} shape:{page['metadata']['shape']} axes:{page['metadata']['axes']}\n"
-                for k, frame in enumerate(page["frames"]):
+def _iter_page_html(page,max_text_length=None,indent_str="&nbsp;&nbsp;&nbsp;",max_bytes=None):
+    # Add an indention for the tags table, then the table header
+    yield indent_str
+    yield ("<table><tr><th><b>name</b></th><th><b>dtype</b></th><th><b>valueoffset</b></th><th><b>count</b></th>"
+           "<th style='text-align:left;'>value</b></th></tr>")
+    size = 0
+    for n, tag in enumerate(page['tags']):
+        row = (f"<tr><td>{tag[0]}</td><td>{tag[1]}</td><td>{tag[2]}</td><td>{tag[3]}</td>"
+               f"<td style='text-align:left;'>{truncate_text_html(html.escape(str(tag[4])),max_text_length)}</td></tr>")
+        size += len(row)
+        if max_bytes is not None and size > max_bytes:
+            yield f"<tr><td colspan='5'>{len(page['tags'])-n} more tags left out to stay within max_bytes</td></tr>"
+            break
+        yield row
+    yield "</table>"
+
+def _page_html(page,max_text_length=None,indent_str="&nbsp;&nbsp;&nbsp;",max_bytes=None):
+    """
+    Returns the HTML table of a page's tags. With max_bytes, the rows after the table reaches that many
+    characters are left out.
+    """
+    return "".join(_iter_page_html(page,max_text_length,indent_str,max_bytes))
+
+def iter_layout_text(self):
+    """
+    Generates the lines of the text layout of the report (see get_layout_text), without line endings.
+
+    Lazy subtrees that have not been built are walked without being stored on the report.
+    """
+    for series in iter_items(self.report, "series"):
+        series_metadata = series["metadata"]
+        series_name = series_metadata.get("name", "Unnamed Series")
+        yield f"Series index:{series_metadata['index']} name:({series_name}) shape:{series_metadata['shape']} axes:{series_metadata['axes']}"
+        for level in iter_items(series, "levels"):
+            level_metadata = level["metadata"]
+            level_name = level_metadata.get("name", "Unnamed Level")
+            yield f"    Level index:{level['level_index']} name:({level_name}) shape:{level_metadata['shape']} axes:{level_metadata['axes']}"
+            for page in iter_items(level, "pages"):
+                page_metadata = page["metadata"]
+                yield f"        Page index:{page_metadata['index']} shape:{page_metadata['shape']} axes:{page_metadata['axes']}"
+                for run in page["frames"]:
                     # Although frames are a subset from a page, they are on the same level.
-                    text += f"        Frame index:{frame['metadata']['index']} shape:{frame['metadata']['shape']} axes:{frame['metadata']['axes']}\n"
-    return text.rstrip('\n')
+                    yield f"        Frame index:{run_index_text(run)}{_run_count_text(run)} shape:{run['metadata']['shape']} axes:{run['metadata']['axes']}"
+
+def get_layout_text(self):
+    return "\n".join(iter_layout_text(self))
+
+_SERIES_HTML = '<div><span style="color: navy;">Series</span> index:<span style="font-size: 110%; font-family: monospace;"><b>{index}</b></span> name:(<span style="font-size: 110%; font-family: monospace;"><b><u>{name}</u></b></span>) shape:<span style="font-size: 100%; font-family: monospace;">{shape}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{axes}</b></span></div>'
+_LEVEL_HTML = '<div style="margin-left: 20px;"><span style="color: darkgreen;">Level</span> index:<span style="font-size: 110%; font-family: monospace;"><b>{index}</b></span> name:(<span style="font-size: 110%; font-family: monospace;"><b><u>{name}</u></b></span>) shape:<span style="font-size: 100%; font-family: monospace;">{shape}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{axes}</b></span></div>'
+_PAGE_HTML = '<div style="margin-left: 40px;"><span style="color: darkred;">Page</span> index:<span style="font-size: 100%; font-family: monospace;">{index}</span> shape:<span style="font-size: 100%; font-family: monospace;">{shape}</span> axes:<span style="font-size: 100%; font-family: monospace;"><b>{axes}</b></span></div>'
+_FRAME_HTML = '<div style="margin-left: 40px;"><span style="color: darkorange;">Frame</span> index:<span style="font-size: 100%; font-family: monospace;"><b>{index}</b>{count}</span> shape:<span style="font-size: 100%; font-family: monospace;">{shape}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{axes}</b></span></div>'
+
+def iter_layout_html(self):
+    """
+    Generates the HTML layout of the report (see get_layout_html) as chunks of at most one element each.
+
+    Lazy subtrees that have not been built are walked without being stored on the report.
+    """
+    yield '<div style="font-family: Arial, sans-serif; line-height: 1.25;">'
+    for series in iter_items(self.report, "series"):
+        series_metadata = series["metadata"]
+        yield _SERIES_HTML.format(index=series_metadata["index"], name=series_metadata.get("name", "Unnamed Series"),
+                                  shape=_bold_integers_in_list(series_metadata["shape"]), axes=series_metadata["axes"])
+        for level in iter_items(series, "levels"):
+            level_metadata = level["metadata"]
+            yield _LEVEL_HTML.format(index=level["level_index"], name=level_metadata.get("name", "Unnamed Level"),
+                                     shape=_bold_integers_in_list(level_metadata["shape"]), axes=level_metadata["axes"])
+            for page in iter_items(level, "pages"):
+                page_metadata = page["metadata"]
+                index = page_metadata["index"]
+                yield _PAGE_HTML.format(index=f"<b>{index}</b>" if isinstance(index,int) else _bold_integers_in_list(index),
+                                        shape=_bold_integers_in_list(page_metadata["shape"]), axes=page_metadata["axes"])
+                for run in page["frames"]:
+                    yield _FRAME_HTML.format(index=run_index_text(run), count=_run_count_text(run),
+                                             shape=_bold_integers_in_list(run["metadata"]["shape"]), axes=run["metadata"]["axes"])
+    yield '</div>'
 
 def get_layout_html(self):
-    html = '<div style="font-family: Arial, sans-serif; line-height: 1.25;">'
-    for i, series in enumerate(self.report["series"]):
-        series_name = series["metadata"].get("name", "Unnamed Series")
-        html += f'<div><span style="color: navy;">Series</span> index:<span style="font-size: 110%; font-family: monospace;"><b>{series["metadata"]["index"]}</b></span> name:(<span style="font-size: 110%; font-family: monospace;"><b><u>{series_name}</u></b></span>) shape:<span style="font-size: 100%; font-family: monospace;">{_bold_integers_in_list(series["metadata"]["shape"])}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{series["metadata"]["axes"]}</b></span></div>'
-        for j, level in enumerate(series["levels"]):
-            level_name = level["metadata"].get("name", "Unnamed Level")
-            html += f'<div style="margin-left: 20px;"><span style="color: darkgreen;">Level</span> index:<span style="font-size: 110%; font-family: monospace;"><b>{level["level_index"]}</b></span> name:(<span style="font-size: 110%; font-family: monospace;"><b><u>{level_name}</u></b></span>) shape:<span style="font-size: 100%; font-family: monospace;">{_bold_integers_in_list(level["metadata"]["shape"])}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{level["metadata"]["axes"]}</b></span></div>'
-            for k, page in enumerate(level["pages"]):
-                html += f'<div style="margin-left: 40px;"><span style="color: darkred;">Page</span> index:<span style="font-size: 100%; font-family: monospace;">{"<b>"+str(page["metadata"]["index"])+"</b>" if isinstance(page["metadata"]["index"],int) else _bold_integers_in_list(page["metadata"]["index"])}</span> shape:<span style="font-size: 100%; font-family: monospace;">{_bold_integers_in_list(page["metadata"]["shape"])}</span> axes:<span style="font-size: 100%; font-family: monospace;"><b>{page["metadata"]["axes"]}</b></span></div>'
-                for l, frame in enumerate(page["frames"]):
-                    html += f'<div style="margin-left: 40px;"><span style="color: darkorange;">Frame</span> index:<span style="font-size: 100%; font-family: monospace;"><b>{frame["metadata"]["index"]}</b></span> shape:<span style="font-size: 100%; font-family: monospace;">{_bold_integers_in_list(frame["metadata"]["shape"])}</span> axes:<span style="font-size: 110%; font-family: monospace;"><b>{frame["metadata"]["axes"]}</b></span></div>'
-    html += '</div>'
-    return html
+    return "".join(iter_layout_html(self))
 
-def _bold_integers_in_list(input_list):
+def write_layout(self, fp, format='text'):
     """
-    Function to bold integers in a list.
-    It returns a HTML string with bolded integers.
+    Writes the layout of the report to a text file object incrementally.
+
+    Args:
+        fp: A text file object to write to.
+        format (str): 'text' for the layout of get_layout_text, or 'html' for the layout of get_layout_html.
+
+    Raises:
+        ValueError: If the format is not 'text' or 'html'.
     """
-    # Convert the list to a string representation
-    input_string = str(input_list)
+    if format == 'text':
+        for n, line in enumerate(iter_layout_text(self)):
+            if n: fp.write("\n")
+            fp.write(line)
+    elif format == 'html':
+        for chunk in iter_layout_html(self):
+            fp.write(chunk)
+    else:
+        raise ValueError(f"Unsupported format {format!r}. Use 'text' or 'html'.")
+
+def _run_count_text(run):
+    return f" count:{run['count']}" if run['count'] > 1 else ""
 
-    # This regular expression matches integers
-    int_regex = re.compile(r'\b\d+\b')
+# This regular expression matches integers
+_INT_REGEX = re.compile(r'\b\d+\b')
 
-    # This function will be used to replace matches with HTML bold tags
-    def replace_with_bold(match):
-        return f'<b>{match.group()}</b>'
+@lru_cache(maxsize=1024)
+def _bold_integers_in_text(input_string):
+    # Replace matches with HTML bold tags
+    return _INT_REGEX.sub(r'<b>\g<0></b>', input_string)
 
-    # Use the re.sub function to replace matches in the string
-    html_string = int_regex.sub(replace_with_bold, input_string)
-    return html_string
+def _bold_integers_in_list(input_list):
+    """
+    Function to bold integers in a list.
+    It returns a HTML string with bolded integers.
+
+    The formatted strings are cached, as the pages of a level usually share the same few shapes.
+    """
+    return _bold_integers_in_text(str(input_list))
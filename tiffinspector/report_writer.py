@@ -0,0 +1,101 @@
+import json
+from typing import IO, Iterator, Optional
+
+from .lazy import iter_items
+from .tags import TagTableCompactor
+from .utils import json_default
+
+# keys holding the lists that make up the series -> levels -> pages tree
+_TREE_KEYS = ('series', 'levels', 'pages')
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=json_default)
+
+def _iter_json(node: dict, compactor: Optional[TagTableCompactor] = None) -> Iterator[str]:
+    yield '{'
+    for n, key in enumerate(node):
+        if n: yield ', '
+        yield _dumps(key)+': '
+        if key in _TREE_KEYS:
+            yield '['
+            for m, item in enumerate(iter_items(node, key)):
+                if m: yield ', '
+                yield from _iter_json(item, compactor)
+            yield ']'
+        elif key == 'tags' and compactor is not None:
+            yield _dumps(compactor.compact(node[key]))
+        else:
+            yield _dumps(node[key])
+    yield '}'
+
+def iter_report_json(self, compact_tags: bool = False) -> Iterator[str]:
+    """
+    Generates the report as chunks of JSON text.
+
+    Joining the chunks gives the same document as json.dumps(self.report), or as
+    json.dumps(compact_report(self.report)) with compact_tags. The series, levels and pages are serialized one
+    at a time, so no chunk is larger than a single page.
+    """
+    if not compact_tags:
+        yield from _iter_json(self.report)
+        return
+    compactor = TagTableCompactor()
+    chunks = _iter_json(self.report, compactor)
+    # the shared tables are only complete once every page has been written, so they are added last
+    previous = next(chunks)
+    for chunk in chunks:
+        yield previous
+        previous = chunk
+    yield ', "tag_tables": '+_dumps(compactor.tables)
+    yield previous
+
+def iter_report_records(self, compact_tags: bool = False) -> Iterator[dict]:
+    """
+    Generates the report as flat records, one per TIFF file, series, level and page.
+
+    Each record has a 'record' type ('tiff', 'series', 'level' or 'page'), the 'file_path', the indices that
+    locate it in the tree and the fields of that node other than its child list. With compact_tags, page tags
+    are references into shared tables (see tags.TagTableCompactor) and each table is emitted as a 'tag_table'
+    record with its 'table_index' and 'rows' before the first page that uses it.
+    """
+    def fields(node, child_key):
+        return dict((key, node[key]) for key in node if key != child_key)
+
+    compactor = TagTableCompactor() if compact_tags else None
+    yield dict(record='tiff', file_path=self.file_path, **fields(self.report, 'series'))
+    for i, series in enumerate(iter_items(self.report, 'series')):
+        yield dict(record='series', file_path=self.file_path, series_index=i, **fields(series, 'levels'))
+        for level in iter_items(series, 'levels'):
+            yield dict(record='level', file_path=self.file_path, series_index=i, **fields(level, 'pages'))
+            for k, page in enumerate(iter_items(level, 'pages')):
+                if compactor is not None:
+                    table_count = len(compactor.tables)
+                    page = dict(page, tags=compactor.compact(page['tags']))
+                    for t in range(table_count, len(compactor.tables)):
+                        yield dict(record='tag_table', file_path=self.file_path, table_index=t, rows=compactor.tables[t])
+                yield dict(record='page', file_path=self.file_path, series_index=i, level_index=level['level_index'],
+                           page_index=k, **page)
+
+def write_report(self, fp: IO[str], format: str = 'json', compact_tags: bool = False) -> None:
+    """
+    Writes the report to a text file object incrementally.
+
+    Args:
+        fp: A text file object to write to.
+        format (str): 'json' for a single JSON document identical to json.dumps(self.report), or 'jsonl' for
+                      JSON Lines with one record per file, series, level and page (see iter_report_records).
+        compact_tags (bool): If True, identical tag tables are written once and pages refer to them with the
+                             rows that differ (see tags.compact_report and tags.expand_report).
+
+    Raises:
+        ValueError: If the format is not 'json' or 'jsonl'.
+    """
+    if format == 'json':
+        for chunk in iter_report_json(self, compact_tags):
+            fp.write(chunk)
+    elif format == 'jsonl':
+        for record in iter_report_records(self, compact_tags):
+            fp.write(_dumps(record))
+            fp.write('\n')
+    else:
+        raise ValueError(f"Unsupported format {format!r}. Use 'json' or 'jsonl'.")
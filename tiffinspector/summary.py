@@ -0,0 +1,148 @@
+import json
+from typing import Optional, Tuple
+from xml.etree import ElementTree
+
+import tifffile
+
+from .utils import extract_metadata
+
+# Series formats tifffile checks for before 'ome' and 'uniform' whose layout is only known from walking pages
+_OTHER_SERIES_FORMATS = ('lsm', 'mmstack', 'imagej', 'ndtiff', 'fluoview', 'stk', 'sis', 'svs', 'scn', 'qpi', 'ndpi',
+                         'bif', 'scanimage', 'nih', 'mdgel')
+
+def _product(shape) -> int:
+    size = 1
+    for x in shape:
+        size *= int(x)
+    return size
+
+def _squeeze(shape, axes) -> list:
+    # length-1 dimensions other than Y and X are dropped, as tifffile does for series shapes
+    return [size for size, axis in zip(shape, axes) if size != 1 or axis in 'YX']
+
+def _shaped_series(tiff, page_count: int) -> Optional[Tuple[list, str, int]]:
+    # each series of a tifffile "shaped" file starts with a page whose JSON description holds the series shape,
+    # and spans as many pages as that shape needs, so only the first IFD of each series is read
+    pages = tiff.pages
+    first_shape = first_dtype = None
+    series_count = 0
+    index = 0
+    while index < page_count:
+        page = pages[index]
+        description = getattr(page, 'shaped_description', None)
+        if description is None:
+            return None
+        metadata = json.loads(description)
+        shape = list(metadata['shape'])
+        page_size = _product(page.shape)
+        if not page_size or _product(shape) % page_size:
+            return None
+        if first_shape is None:
+            first_shape, first_dtype = shape, str(page.dtype)
+        series_count += 1
+        index += 1 if metadata.get('truncated') else max(1, _product(shape)//page_size)
+    return first_shape, first_dtype, series_count
+
+def _ome_series(tiff) -> Optional[Tuple[list, str, int]]:
+    # the OME-XML of the first page describes every image; files that need tifffile's special handling
+    # (RGB samples, modulo annotations, data in other files) are left to the full series parser
+    page = tiff.pages.first
+    if page.samplesperpixel > 1:
+        return None
+    try:
+        root = ElementTree.fromstring(page.description)
+    except ElementTree.ParseError:
+        return None
+    namespace = root.tag[:root.tag.index('}')+1] if root.tag.startswith('{') else ''
+    if root.find(f'{namespace}StructuredAnnotations') is not None:
+        return None
+    images = root.findall(f'{namespace}Image')
+    if not images:
+        return None
+    for uuid in root.iter(f'{namespace}UUID'):
+        if uuid.get('FileName'):
+            return None
+    pixels = images[0].find(f'{namespace}Pixels')
+    if pixels is None:
+        return None
+    axes = ''.join(reversed(pixels.get('DimensionOrder', 'XYZCT')))
+    shape = [int(pixels.get(f'Size{axis}', 1)) for axis in axes]
+    return _squeeze(shape, axes), str(page.dtype), len(images)
+
+def header_series(tiff, page_count: int) -> Optional[Tuple[list, str, int]]:
+    """
+    Determines the shape and dtype of the first series and the number of series from the first IFD(s).
+
+    Supported are tifffile "shaped" files (one IFD read per series), single-file OME-TIFFs without RGB samples or
+    modulo annotations (the OME-XML of the first IFD), and files that tifffile reads as one uniform series (the
+    first, second, eighth and last IFD). Other files return None.
+
+    Args:
+        tiff: The open tifffile TiffFile.
+        page_count (int): The number of IFDs in the main chain.
+
+    Returns:
+        tuple: (shape, dtype, series_count), or None if the headers do not determine them.
+    """
+    if not page_count:
+        return None
+    if tiff.is_shaped:
+        return _shaped_series(tiff, page_count)
+    if any(getattr(tiff, f'is_{kind}', False) for kind in _OTHER_SERIES_FORMATS):
+        return None
+    if tiff.is_ome:
+        return _ome_series(tiff)
+    if tiff.is_uniform:
+        page = tiff.pages.first
+        shape = list(page.shape) if page_count == 1 else [page_count, *page.shape]
+        return shape, str(page.dtype), 1
+    return None
+
+def series_fields(tiff, page_count: int) -> Tuple[list, str, int]:
+    """
+    Returns the shape and dtype of the first series and the number of series.
+
+    They come from the first IFD(s) where header_series determines them, and from tifffile's series otherwise,
+    which reads every IFD of the file.
+
+    Args:
+        tiff: The open tifffile TiffFile.
+        page_count (int): The number of IFDs in the main chain.
+
+    Returns:
+        tuple: (shape, dtype, series_count)
+    """
+    header = header_series(tiff, page_count)
+    if header is None:
+        first_series = tiff.series[0]
+        header = list(first_series.shape), str(first_series.dtype), len(tiff.series)
+    return header
+
+def summary_report(tiff) -> dict:
+    """
+    Builds the top-level fields of a report (metadata, shape, dtype, series_count and page_count) without
+    walking every page.
+
+    The page count comes from tifffile's scan of the IFD chain, which reads only the tag count and next-IFD
+    offset of each IFD. The shape, dtype and series count come from the first IFD(s) (see header_series), and
+    only for files whose headers do not determine them are the series parsed in full.
+
+    Args:
+        tiff: The open tifffile TiffFile.
+
+    Returns:
+        dict: The summary report, with the same values as the corresponding fields of a full report.
+    """
+    report = {'metadata': extract_metadata(tiff, 'tiff_schema')}
+    # len() of the page list follows the IFD chain without decoding tags
+    page_count = len(tiff.pages)
+    report['shape'], report['dtype'], report['series_count'] = series_fields(tiff, page_count)
+    report['page_count'] = page_count
+    return report
+
+def summarize_file(file_path: str) -> dict:
+    """
+    Returns the summary report of a TIFF file (see summary_report).
+    """
+    with tifffile.TiffFile(file_path) as tiff:
+        return summary_report(tiff)
@@ -0,0 +1,256 @@
+from typing import Any, Iterable, Optional
+
+import numpy
+
+# How values of tags with more than max_tag_values entries are stored in the report
+LARGE_TAG_VALUE_POLICIES = ('list', 'summarize', 'array', 'reference')
+
+def tag_selector(tags: Optional[Iterable[Any]] = None, exclude_tags: Optional[Iterable[Any]] = None):
+    """
+    Builds a predicate selecting which tags are extracted into the page reports.
+
+    Args:
+        tags: Names or codes of the tags to extract. None extracts all tags.
+        exclude_tags: Names or codes of tags to skip. Applied after the allow list.
+
+    Returns:
+        A callable taking a tifffile TiffTag and returning True if the tag should be extracted.
+    """
+    allowed = None if tags is None else set(str(x) for x in tags)
+    excluded = set(str(x) for x in exclude_tags or ())
+    def selected(tag) -> bool:
+        keys = (tag.name, str(tag.code))
+        if allowed is not None and not any(x in allowed for x in keys):
+            return False
+        return not any(x in excluded for x in keys)
+    return selected
+
+def tag_value_dtype(tag, byteorder: str) -> numpy.dtype:
+    """
+    Returns the NumPy dtype of a single value of a tag, e.g. '<u4' for LONG.
+    """
+    return numpy.dtype(byteorder+tag.dataformat[-1])
+
+def tag_array(tag, tiff) -> numpy.ndarray:
+    """
+    Returns the values of a tag as a NumPy array.
+
+    Values that tifffile has not loaded yet are read straight from the file into the array, so no Python
+    objects are created for the individual values.
+
+    Args:
+        tag: The tifffile TiffTag.
+        tiff: The open tifffile TiffFile the tag belongs to.
+
+    Returns:
+        numpy.ndarray: A one dimensional array of the tag values (uint8 for byte strings).
+    """
+    loaded = getattr(tag, '_value', None)
+    if loaded is None and tag.count > 0:
+        dtype = tag_value_dtype(tag, tiff.byteorder)
+        count = tag.count*int(tag.dataformat[:-1] or 1)
+        fh = tiff.filehandle
+        with fh.lock:
+            fh.seek(tag.valueoffset)
+            return fh.read_array(dtype, count)
+    value = tag.value
+    if isinstance(value, (bytes, bytearray)):
+        return numpy.frombuffer(value, numpy.uint8)
+    return numpy.asarray(value).reshape(-1)
+
+def tag_reference(tag, byteorder: str) -> dict:
+    """
+    Returns a reference to the values of a tag in the file, without reading them.
+
+    Returns:
+        dict: {'offset': file offset of the values, 'dtype': NumPy dtype of one value, 'count': number of
+              values}. Multi-value types such as RATIONAL count each part, as in tag_array.
+    """
+    return {
+        'offset': tag.valueoffset,
+        'dtype': tag_value_dtype(tag, byteorder).str,
+        'count': tag.count*int(tag.dataformat[:-1] or 1)
+    }
+
+def is_tag_reference(value: Any) -> bool:
+    """
+    Returns True if a tag value from a report is a reference made by tag_reference.
+    """
+    return isinstance(value, dict) and value.keys() == {'offset', 'dtype', 'count'}
+
+def read_tag_reference(reference: dict, file_map: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns the values a tag reference points to as a read-only view of a memory-mapped file.
+
+    Args:
+        reference (dict): The reference from tag_reference.
+        file_map (numpy.ndarray): The whole file as a uint8 numpy.memmap. Only the pages holding the values
+                                  are read, when the returned array is accessed.
+
+    Returns:
+        numpy.ndarray: A one dimensional array of the values.
+    """
+    dtype = numpy.dtype(reference['dtype'])
+    start = reference['offset']
+    stop = start+reference['count']*dtype.itemsize
+    if stop > file_map.size:
+        raise ValueError(f"Tag values at {start}-{stop} are beyond the end of the file ({file_map.size} bytes)")
+    return file_map[start:stop].view(dtype)
+
+def summarize_array(values: numpy.ndarray) -> dict:
+    """
+    Summarizes the values of a large tag as its count, dtype, minimum and maximum.
+    """
+    summary = {'count': int(values.size), 'dtype': str(values.dtype), 'min': None, 'max': None}
+    if values.size and values.dtype.kind in 'biuf':
+        summary['min'] = values.min().item()
+        summary['max'] = values.max().item()
+    return summary
+
+def _freeze(value: Any) -> Any:
+    # a hashable stand-in for a json-like tag value
+    if isinstance(value, list):
+        return tuple(_freeze(x) for x in value)
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, numpy.ndarray):
+        return ('ndarray', value.dtype.str, value.tobytes())
+    return value
+
+class TagTableCompactor:
+    """
+    Replaces the tag lists of pages with references to shared tag tables plus the rows that differ.
+
+    A tag table is the [name, dtype, valueoffset, count, value] rows of the first page that used it. A page whose
+    tags match a known table exactly (ignoring valueoffsets) refers to it, a page with the same tag names refers
+    to the most recent such table plus a 'diff' of the [name, dtype, count, value] rows that changed, and
+    anything else starts a new table. Valueoffsets are stored as a single 'shift' from the table when every
+    offset moved by the same amount, which is the case when IFDs are written the same way one after another,
+    and as a full 'valueoffsets' list otherwise. In a stack where only offsets and byte counts vary, every page
+    after the first is a table index, a shift and a diff of a couple of rows.
+
+    Example:
+        >>> compactor = TagTableCompactor()
+        >>> refs = [compactor.compact(page['tags']) for page in pages]
+        >>> expand_tags(refs[1], compactor.tables) == pages[1]['tags']
+        True
+    """
+    def __init__(self, max_diff_fraction: float = 0.5):
+        """
+        Args:
+            max_diff_fraction (float): The largest fraction of rows that may differ from a table before the page
+                                       starts a new table instead.
+        """
+        self.max_diff_fraction = max_diff_fraction
+        self.tables = []
+        self._frozen_tables = []
+        self._exact = {}
+        self._by_names = {}
+
+    def _add_table(self, tags, frozen_rows, names) -> int:
+        t = len(self.tables)
+        self.tables.append(tags)
+        self._frozen_tables.append(frozen_rows)
+        self._exact[frozen_rows] = t
+        self._by_names[names] = t
+        return t
+
+    def _ref(self, t: int, tags: list, diff: list) -> dict:
+        valueoffsets = [x[2] for x in tags]
+        shifts = set(a-b[2] for a, b in zip(valueoffsets, self.tables[t]))
+        if len(shifts) == 1:
+            return {'table': t, 'shift': shifts.pop(), 'diff': diff}
+        return {'table': t, 'valueoffsets': valueoffsets, 'diff': diff}
+
+    def compact(self, tags: Optional[list]) -> Optional[dict]:
+        """
+        Compacts the tag list of one page.
+
+        Args:
+            tags: The page's list of [name, dtype, valueoffset, count, value] rows, or None.
+
+        Returns:
+            dict: {'table': index into tables, 'shift' or 'valueoffsets', 'diff': [[position, row], ...]}, or
+                  None if the page has no tags.
+        """
+        if tags is None:
+            return None
+        frozen_rows = tuple((x[0], x[1], x[3], _freeze(x[4])) for x in tags)
+        names = tuple(x[0] for x in tags)
+        t = self._exact.get(frozen_rows)
+        if t is not None:
+            return self._ref(t, tags, [])
+        t = self._by_names.get(names)
+        if t is not None:
+            diff = [[i, [tags[i][0], tags[i][1], tags[i][3], tags[i][4]]]
+                    for i, (a, b) in enumerate(zip(frozen_rows, self._frozen_tables[t])) if a != b]
+            if len(diff) <= self.max_diff_fraction*len(tags):
+                return self._ref(t, tags, diff)
+        t = self._add_table(tags, frozen_rows, names)
+        return self._ref(t, tags, [])
+
+def expand_tags(ref: Optional[dict], tables: list) -> Optional[list]:
+    """
+    Rebuilds the [name, dtype, valueoffset, count, value] rows of a page from a compacted reference.
+
+    Args:
+        ref: The page's compacted tags from TagTableCompactor.compact, or None.
+        tables: The shared tag tables.
+
+    Returns:
+        list: The page's tag rows, or None if the page has no tags.
+    """
+    if ref is None:
+        return None
+    table = tables[ref['table']]
+    if 'shift' in ref:
+        valueoffsets = [x[2]+ref['shift'] for x in table]
+    else:
+        valueoffsets = ref['valueoffsets']
+    rows = [[x[0], x[1], x[3], x[4]] for x in table]
+    for i, row in ref['diff']:
+        rows[i] = row
+    return [[row[0], row[1], valueoffset, row[2], row[3]] for row, valueoffset in zip(rows, valueoffsets)]
+
+def _iter_pages(report: dict):
+    for series in report['series']:
+        for level in series['levels']:
+            for page in level['pages']:
+                yield page
+
+def compact_report(report: dict) -> dict:
+    """
+    Returns a copy of a report whose page tags are compacted into shared 'tag_tables'.
+
+    Only the containers down to the pages are copied; everything else is shared with the original report.
+    """
+    compactor = TagTableCompactor()
+    new_report = dict(report)
+    new_report['series'] = []
+    for series in report['series']:
+        new_series = dict(series)
+        new_series['levels'] = []
+        for level in series['levels']:
+            new_level = dict(level)
+            new_level['pages'] = []
+            for page in level['pages']:
+                new_page = dict(page)
+                new_page['tags'] = compactor.compact(page['tags'])
+                new_level['pages'].append(new_page)
+            new_series['levels'].append(new_level)
+        new_report['series'].append(new_series)
+    new_report['tag_tables'] = compactor.tables
+    return new_report
+
+def expand_report(report: dict) -> dict:
+    """
+    Expands the page tags of a report compacted with compact_report, in place.
+
+    Reports without 'tag_tables' are returned unchanged.
+    """
+    if 'tag_tables' not in report:
+        return report
+    tables = report.pop('tag_tables')
+    for page in _iter_pages(report):
+        page['tags'] = expand_tags(page['tags'], tables)
+    return report
@@ -1,9 +1,67 @@
-import xmltodict
-from typing import Union, Optional, Any
+from typing import Union, Optional, Any, Callable, Dict, NamedTuple, Tuple
 
 import xml.etree.ElementTree as ET
 
-import json, struct, html, pkg_resources
+import json, struct, html, copy, hashlib, operator
+from collections import OrderedDict
+
+try:
+    from importlib.resources import files as resource_files
+except ImportError:
+    from importlib_resources import files as resource_files
+
+def _read_schema_file(schema_name: str) -> dict:
+    """
+    Reads and parses a JSON schema file from disk, bypassing the schema registry.
+
+    Args:
+        schema_name (str): The name of the schema, without the '.json' extension.
+
+    Returns:
+        dict: A dictionary representation of the JSON schema.
+    """
+    schema_file = resource_files('tiffinspector') / 'schemas' / f'{schema_name}.json'
+    return json.loads(schema_file.read_text())
+
+class SchemaEntry(NamedTuple):
+    """
+    A parsed schema together with the values derived from it that report building needs for every object.
+
+    Attributes:
+        schema: The parsed JSON schema.
+        metadata_properties: The names of the properties listed under 'metadata' in the schema.
+        getter: An attribute getter returning the metadata properties of an object as a tuple.
+    """
+    schema: dict
+    metadata_properties: Tuple[str, ...]
+    getter: Callable[[Any], tuple]
+
+_SCHEMA_REGISTRY: Dict[str, SchemaEntry] = {}
+
+def get_schema_entry(schema_name: str) -> SchemaEntry:
+    """
+    Returns the registry entry for a schema, reading the schema from disk only the first time it is requested.
+
+    Args:
+        schema_name (str): The name of the schema, without the '.json' extension.
+
+    Returns:
+        SchemaEntry: The parsed schema, its metadata property names and an attribute getter for them.
+    """
+    entry = _SCHEMA_REGISTRY.get(schema_name)
+    if entry is None:
+        schema = _read_schema_file(schema_name)
+        properties = tuple(schema.get('properties', {}).get('metadata', {}).get('properties', {}).keys())
+        if len(properties) == 1:
+            _single = operator.attrgetter(properties[0])
+            getter = lambda obj: (_single(obj),)
+        elif properties:
+            getter = operator.attrgetter(*properties)
+        else:
+            getter = lambda obj: ()
+        entry = SchemaEntry(schema, properties, getter)
+        _SCHEMA_REGISTRY[schema_name] = entry
+    return entry
 
 def load_schema(schema_name: str) -> dict:
     """
@@ -12,19 +70,61 @@ def load_schema(schema_name: str) -> dict:
     Args:
         schema_name (str): The name of the schema to be loaded. This is used to construct the 
                            filename by appending '.json' and it is assumed to be located in 
-                           the '../schemas/' directory relative to 'tiffinspector'.
+                           the 'schemas' directory of the 'tiffinspector' package.
 
     Returns:
-        dict: A dictionary representation of the JSON schema.
+        dict: A dictionary representation of the JSON schema. The schema is parsed once and a copy of the
+              cached schema is returned so callers are free to modify it.
 
     Raises:
         FileNotFoundError: If the schema file does not exist.
         json.JSONDecodeError: If the file does not contain valid JSON.
     """
-    schema_path = pkg_resources.resource_filename('tiffinspector', f'../schemas/{schema_name}.json')
-    with open(schema_path, 'r') as file:
-        schema = json.load(file)
-    return schema
+    return copy.deepcopy(get_schema_entry(schema_name).schema)
+
+def extract_metadata(obj: Any, schema_name: str) -> dict:
+    """
+    Reads the metadata properties listed in a schema from an object.
+
+    Tuples and sets are converted to lists so the result is json-compatible.
+
+    Args:
+        obj: The tifffile object (TiffFile, TiffPageSeries, TiffPage or TiffFrame) to read from.
+        schema_name (str): The name of the schema listing the metadata properties.
+
+    Returns:
+        dict: The metadata properties and their values.
+    """
+    entry = get_schema_entry(schema_name)
+    metadata = dict(zip(entry.metadata_properties, entry.getter(obj)))
+    for _property, value in metadata.items():
+        if isinstance(value, (tuple, set)):
+            metadata[_property] = list(value)
+    return metadata
+
+def json_default(obj: Any) -> Any:
+    """
+    Converts values that the json module cannot serialize into json-compatible ones.
+
+    Intended to be passed as the ``default`` argument of ``json.dump``/``json.dumps`` when writing reports.
+
+    Args:
+        obj: The value that json could not serialize.
+
+    Returns:
+        A json-compatible representation: bytes become a '0x' prefixed hex string (as in the tag tables),
+        sets and tuples become lists, and NumPy scalars and arrays become Python numbers and lists.
+
+    Raises:
+        TypeError: If the value has no json-compatible representation.
+    """
+    if isinstance(obj, (bytes, bytearray)):
+        return '0x'+bytes(obj).hex()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 def is_xml(string: str) -> bool:
     """
@@ -42,6 +142,67 @@ def is_xml(string: str) -> bool:
     except ET.ParseError:
         return False
 
+def looks_like_xml(string: str) -> bool:
+    """
+    Cheaply determines if a string looks like an XML document, without parsing it.
+
+    Args:
+        string (str): The input string to be tested.
+
+    Returns:
+        bool: True if the string starts with a tag (after leading whitespace) and ends with one.
+    """
+    if not isinstance(string, str):
+        return False
+    start = string.lstrip()[:1]
+    end = string.rstrip()[-1:]
+    return start == '<' and end == '>'
+
+def description_digest(description: str) -> str:
+    """
+    Returns the hex SHA-1 digest identifying the content of an image description.
+    """
+    return hashlib.sha1(description.encode('utf-8', 'surrogatepass')).hexdigest()
+
+# parsed descriptions by content digest, shared by every page and report in the process
+_DESCRIPTION_CACHE: 'OrderedDict[str, dict]' = OrderedDict()
+_DESCRIPTION_CACHE_SIZE = 64
+
+def parse_description(description: str, digest: Optional[str] = None) -> dict:
+    """
+    Parses an image description once per distinct content.
+
+    The format is decided with looks_like_xml and XML is parsed in a single pass with xmltodict. A description
+    that looks like XML but fails to parse is treated as plain text. Results are memoized by content digest, so
+    OME-XML repeated on every page is only parsed once.
+
+    Args:
+        description (str): The image description.
+        digest (str): The description_digest of the description, if already known.
+
+    Returns:
+        dict: {'format': 'xml' or 'text', 'tree': the parsed XML as a dict, or None for plain text}.
+              The returned dict is shared and should not be modified.
+    """
+    if digest is None:
+        digest = description_digest(description)
+    parsed = _DESCRIPTION_CACHE.get(digest)
+    if parsed is not None:
+        _DESCRIPTION_CACHE.move_to_end(digest)
+        return parsed
+    parsed = {'format': 'text', 'tree': None}
+    if looks_like_xml(description):
+        import xmltodict
+        from xml.parsers.expat import ExpatError
+        try:
+            parsed = {'format': 'xml', 'tree': xmltodict.parse(description)}
+        except ExpatError:
+            pass
+    _DESCRIPTION_CACHE[digest] = parsed
+    if len(_DESCRIPTION_CACHE) > _DESCRIPTION_CACHE_SIZE:
+        _DESCRIPTION_CACHE.popitem(last=False)
+    return parsed
+
 def truncate_text(val: Any, max_text_length: int) -> str:
     """
     Truncates a text if its length exceeds the specified maximum length.
@@ -104,6 +265,8 @@ def parse_image_description(image_description: str) -> str:
         xml.etree.ElementTree.ParseError: If the input string is not parseable as XML.
         KeyError: If the root element is missing in the XML data.
     """
+    import xmltodict
+
     root = ET.fromstring(image_description)
     return xmltodict.parse(xmltodict.parse(image_description)['root'])
 